@@ -0,0 +1,139 @@
+"""Adjustment Suggestions: aperture × focal length search over a 2-D grid.
+
+The whole grid is evaluated in one broadcast pass through optics.py, so
+fine focal steps and third-stop apertures cost array work, not Python loops.
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+import cache
+import optics
+import tables
+
+# 光圈選項來自 tables (可由 CAMERA_TABLES 擴充)
+APERTURE_CHOICES = tables.DEFAULT.stops["standard"]
+THIRD_STOPS = tables.DEFAULT.stops["third"]
+
+
+class GridResult(NamedTuple):
+    N_vals: np.ndarray   # (n,) f-numbers searched
+    f_vals: np.ndarray   # (m,) focal lengths searched (mm)
+    ok: np.ndarray       # (n, m) feasibility mask
+    dN: np.ndarray       # (n,) normalized |ΔN|
+    dF: np.ndarray       # (m,) normalized |Δf|
+    pareto: np.ndarray   # (k, 2) (N index, f index), sorted by ascending ΔN
+
+    def focal_lengths_for(self, i):
+        """Feasible focal lengths at N_vals[i] (ascending)."""
+        return self.f_vals[self.ok[i]]
+
+    def apertures_for(self, j):
+        """Feasible f-numbers at f_vals[j] (ascending)."""
+        return self.N_vals[self.ok[:, j]]
+
+
+def focal_grid(focal_length, f_adj, f_step=1.0):
+    f_min = max(1.0, math.floor((focal_length - f_adj) / f_step) * f_step)
+    f_max = math.ceil((focal_length + f_adj) / f_step) * f_step
+    n = int(round((f_max - f_min) / f_step)) + 1
+    return np.round(f_min + f_step * np.arange(n), 6)
+
+
+def pareto_front(dN, dF, ok):
+    """Non-dominated (ΔN, Δf) points of the feasible grid cells, by ascending ΔN.
+
+    The first point has the smallest ΔN (ties go to the smaller Δf), the
+    last the smallest Δf (ties go to the smaller ΔN).
+    """
+    ii, jj = np.nonzero(ok)
+    if ii.size == 0:
+        return np.empty((0, 2), dtype=int)
+    a, b = dN[ii], dF[jj]
+    order = np.lexsort((b, a))
+    b_sorted = b[order]
+    # 依 ΔN 排序後，Δf 必須嚴格小於之前所有點才在前緣上
+    prev_min = np.minimum.accumulate(np.concatenate(([np.inf], b_sorted[:-1])))
+    keep = order[b_sorted < prev_min]
+    return np.column_stack((ii[keep], jj[keep]))
+
+
+@cache.memoize(cache.METRICS)
+def search_grid(f_number, focal_length, pixel_size, sensor_width, h_res,
+                focus_mm, min_dof_cm, max_dof_cm, required_px_at_5m,
+                N_adj, f_adj, f_step=1.0, apertures=APERTURE_CHOICES):
+    """Evaluate every (f-number, focal length) pair within the ± ranges."""
+    apertures = np.asarray(apertures, dtype=float)
+    N_vals = apertures[(apertures >= f_number - N_adj) & (apertures <= f_number + N_adj)]
+    f_vals = focal_grid(focal_length, f_adj, f_step)
+
+    N = N_vals[:, None]
+    f = f_vals[None, :]
+    C = tables.sensor_table(pixel_size).coc(N)
+    Dn, Df = optics.dof_limits(f, N, C, focus_mm)
+    ok_dof = optics.covers_range(Dn, Df, min_dof_cm, max_dof_cm)
+    px5 = optics.pixels_at_distance(sensor_width, h_res, f_vals, optics.TEST_MM)
+    ok = np.asarray(ok_dof & (px5 >= required_px_at_5m)[None, :])
+
+    dN = np.abs(N_vals - f_number) / (np.ptp(N_vals) + 1e-6) if N_vals.size else N_vals
+    dF = np.abs(f_vals - focal_length) / (np.ptp(f_vals) + 1e-6)
+    return GridResult(N_vals, f_vals, ok, dN, dF, pareto_front(dN, dF, ok))
+
+
+class SolverResult(NamedTuple):
+    N_vals: np.ndarray    # (n,) f-numbers solved
+    f_lo: np.ndarray      # (n,) smallest feasible focal length (mm)
+    f_hi: np.ndarray      # (n,) largest feasible focal length (mm)
+    feasible: np.ndarray  # (n,) f_lo <= f_hi
+    bound_hi: np.ndarray  # (n,) constraint fixing f_hi: "near", "far", "focus" or "range"
+
+
+def _upper_root(K, c, d):
+    # f + f²/K <= c - d·f  ⇔  f²/K + (1+d)·f - c <= 0，取正根
+    p = 1 + d
+    return K * (-p + np.sqrt(p * p + 4 * c / K)) / 2
+
+
+@cache.memoize(cache.METRICS)
+def solve_focal_intervals(N_vals, pixel_size, sensor_width, h_res, focus_mm,
+                          min_dof_cm, max_dof_cm, required_px_at_5m):
+    """Exact feasible focal-length interval for each f-number.
+
+    px5 grows with f, so it gives the lower bound in closed form. H = f + f²/(N·C)
+    also grows with f, and both Dn <= near and Df >= far reduce to H <= c - d·f,
+    so each gives an upper bound as the positive root of a quadratic.
+    """
+    N = np.asarray(N_vals, dtype=float)
+    u = float(focus_mm)
+    a = min_dof_cm * 10
+    b = max_dof_cm * 10
+    K = N * tables.sensor_table(pixel_size).coc(N)
+
+    # px5 >= required  ⇔  m >= m_req, m = f / (TEST_MM - f)
+    m_req = required_px_at_5m * sensor_width / (optics.FACE_WIDTH_CM * 10 * h_res)
+    f_lo = np.full_like(N, m_req * optics.TEST_MM / (1 + m_req))
+
+    # Dn <= a  ⇔  H·(u - a) <= a·(u - f)；a >= u 時恆成立
+    if a < u:
+        f_near = _upper_root(K, a * u / (u - a), a / (u - a))
+    else:
+        f_near = np.full_like(N, np.inf)
+
+    # Df >= b  ⇔  H <= u (Df = ∞) 或 H·(b - u) <= b·(u - f)；b <= u 時恆成立
+    if b > u:
+        f_far = np.maximum(_upper_root(K, u, 0.0), _upper_root(K, b * u / (b - u), b / (b - u)))
+    else:
+        f_far = np.full_like(N, np.inf)
+
+    f_hi = np.minimum(np.minimum(f_near, f_far), u)
+    bound_hi = np.where(f_hi == f_near, "near", np.where(f_hi == f_far, "far", "focus"))
+    return SolverResult(N, f_lo, f_hi, f_lo <= f_hi, bound_hi)
+
+
+def clip_intervals(sol, f_min, f_max):
+    """sol restricted to focal lengths in [f_min, f_max] (the grid's ± range)."""
+    f_lo = np.maximum(sol.f_lo, f_min)
+    f_hi = np.minimum(sol.f_hi, f_max)
+    bound_hi = np.where(f_hi < sol.f_hi, "range", sol.bound_hi)
+    return SolverResult(sol.N_vals, f_lo, f_hi, f_lo <= f_hi, bound_hi)
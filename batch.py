@@ -0,0 +1,197 @@
+"""Headless batch evaluation of camera SKUs.
+
+    python batch.py skus.csv results.csv [--near-cm 50 --far-cm 1500 --px 80]
+
+Rows stream from a CSV or Parquet file in chunks. Chunks are evaluated with
+the vectorized optics engine on a process pool, and results are appended to
+the output (CSV or Parquet) in input order. At most 2 × workers chunks are
+in flight, so memory stays bounded however large the input is.
+
+Input columns: h_res, focal_length (mm), f_number, and sensor_width (mm)
+and/or pixel_size (µm). focus_cm is optional; missing or blank values
+use --focus-cm.
+Parquet output has a fixed schema: those columns and the numeric results
+are float64, the checks are bool, and any other column is a string. Parquet
+needs pyarrow.
+"""
+import argparse
+import collections
+import concurrent.futures
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import optics
+
+CHUNK_ROWS = 100_000
+
+# Parquet 輸出的固定型別：read_csv 逐塊推斷型別，缺值會讓 int64 變 float64 或 object
+FLOAT_COLUMNS = ("h_res", "focal_length", "f_number", "sensor_width", "pixel_size", "focus_cm",
+                 "distance_fr_cm", "near_cm", "far_cm", "px5")
+BOOL_COLUMNS = ("covers", "px_ok", "ok")
+
+
+def evaluate_chunk(df, focus_cm, near_cm, far_cm, required_px):
+    """Summary Check for every row of df; returns df with result columns added."""
+    h_res = df["h_res"].to_numpy(dtype=float)
+    sw = df["sensor_width"].to_numpy(dtype=float) if "sensor_width" in df else np.full(len(df), np.nan)
+    ps = df["pixel_size"].to_numpy(dtype=float) if "pixel_size" in df else np.full(len(df), np.nan)
+    # 與頁面相同：有 sensor width 就推 pixel size，否則反推 sensor width
+    sensor_width = np.where(np.isnan(sw), optics.sensor_width_from_pixel(ps, h_res), sw)
+    pixel_size = np.where(np.isnan(sw), ps, optics.pixel_size_from_width(sw, h_res))
+    focus = df["focus_cm"].to_numpy(dtype=float) if "focus_cm" in df else np.full(len(df), np.nan)
+    focus = np.where(np.isnan(focus), focus_cm, focus)  # 空白的 focus_cm 用預設值
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = optics.evaluate(
+            sensor_width, h_res, df["focal_length"].to_numpy(dtype=float),
+            df["f_number"].to_numpy(dtype=float), pixel_size, np.asarray(focus) * 10,
+            near_cm, far_cm, required_px,
+        )
+    out = df.copy()
+    out["sensor_width"] = sensor_width
+    out["pixel_size"] = pixel_size
+    out["distance_fr_cm"] = r["distance_fr_mm"] / 10
+    out["near_cm"] = r["near_mm"] / 10
+    out["far_cm"] = r["far_mm"] / 10
+    out["px5"] = r["px5"]
+    out["covers"] = r["covers"]
+    out["px_ok"] = r["px_ok"]
+    out["ok"] = r["ok"]
+    return out
+
+
+def _is_parquet(path):
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def _process(df, args, csv_out, header):
+    # CSV 在 worker 內格式化，主行程只負責依序寫檔
+    out = evaluate_chunk(df, *args)
+    return (out.to_csv(index=False, header=header), len(out)) if csv_out else (out, len(out))
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet input/output needs pyarrow: pip install pyarrow")
+    return pa, pq
+
+
+def parquet_table(chunk):
+    """Arrow table of a result chunk with a schema that does not depend on the
+    chunk: known numeric columns as float64, checks as bool, other columns as
+    strings."""
+    pa, _ = _pyarrow()
+    chunk = chunk.copy()
+    fields = []
+    for name in chunk.columns:
+        if name in FLOAT_COLUMNS:
+            chunk[name] = chunk[name].astype("float64")
+            fields.append(pa.field(name, pa.float64()))
+        elif name in BOOL_COLUMNS:
+            fields.append(pa.field(name, pa.bool_()))
+        else:
+            chunk[name] = chunk[name].astype("string")
+            fields.append(pa.field(name, pa.string()))
+    return pa.Table.from_pandas(chunk, schema=pa.schema(fields), preserve_index=False)
+
+
+def read_chunks(path, chunk_rows=CHUNK_ROWS):
+    if _is_parquet(path):
+        _, pq = _pyarrow()  # 只有 Parquet 需要 pyarrow
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+class ChunkWriter:
+    """Appends result chunks (CSV text or DataFrames) to the output file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        if _is_parquet(path):
+            _pyarrow()  # 開始計算前就檢查
+        self._csv = None if _is_parquet(path) else open(path, "w", newline="")
+
+    def write(self, chunk):
+        if self._csv is not None:
+            self._csv.write(chunk)
+            return
+        _, pq = _pyarrow()
+        table = parquet_table(chunk)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._csv is not None:
+            self._csv.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def run(in_path, out_path, workers=None, chunk_rows=CHUNK_ROWS, focus_cm=optics.FOCUS_CM,
+        near_cm=optics.NEAR_CM, far_cm=optics.FAR_CM, required_px=optics.FACE_PIXELS, log=sys.stderr):
+    """Evaluate in_path into out_path; returns (rows, seconds)."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    args = (focus_cm, near_cm, far_cm, required_px)
+    csv_out = not _is_parquet(out_path)
+    writer = ChunkWriter(out_path)
+    rows = 0
+    start = time.perf_counter()
+
+    def done(result):
+        nonlocal rows
+        chunk, n = result
+        writer.write(chunk)
+        rows += n
+        elapsed = time.perf_counter() - start
+        print(f"{rows:,} rows  {rows / elapsed:,.0f} rows/s", file=log)
+
+    try:
+        if workers <= 1:
+            for i, chunk in enumerate(read_chunks(in_path, chunk_rows)):
+                done(_process(chunk, args, csv_out, i == 0))
+        else:
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                pending = collections.deque()
+                for i, chunk in enumerate(read_chunks(in_path, chunk_rows)):
+                    pending.append(pool.submit(_process, chunk, args, csv_out, i == 0))
+                    # 保持輸入順序，且同時處理中的 chunk 不超過 2 × workers
+                    while len(pending) >= 2 * workers:
+                        done(pending.popleft().result())
+                while pending:
+                    done(pending.popleft().result())
+    finally:
+        writer.close()
+    return rows, time.perf_counter() - start
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("input", help="CSV or Parquet file of camera SKUs")
+    p.add_argument("output", help="CSV or Parquet file for the results")
+    p.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    p.add_argument("--focus-cm", type=float, default=optics.FOCUS_CM, help="focus distance when no focus_cm column")
+    p.add_argument("--near-cm", type=float, default=optics.NEAR_CM, help="desired near limit")
+    p.add_argument("--far-cm", type=float, default=optics.FAR_CM, help="desired far limit")
+    p.add_argument("--px", type=float, default=optics.FACE_PIXELS, help="required face pixels at 5 m")
+    a = p.parse_args(argv)
+
+    rows, seconds = run(a.input, a.output, a.workers, a.chunk_rows, a.focus_cm, a.near_cm, a.far_cm, a.px)
+    print(f"done: {rows:,} rows in {seconds:.2f} s ({rows / max(seconds, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
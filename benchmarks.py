@@ -0,0 +1,175 @@
+"""Micro-benchmarks of the calculator's hot paths.
+
+    python benchmarks.py [-k grid] [--json out.json] [--compare base.json]
+
+Each case is timed with timeit (GC off, loop count calibrated to >= 0.2 s,
+best and median of --repeat runs per call). Peak memory comes from one
+extra call under tracemalloc, which sees numpy and Python allocations but
+not PIL/matplotlib internals. Memoized functions are timed through
+__wrapped__, so these numbers are cache misses.
+
+--json saves the results. --compare flags cases whose best time or peak
+memory grew by more than --threshold against a saved run, and exits
+non-zero if there are any.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+import adjust
+import dof_chart
+import optics
+
+GRID_ARGS = (2.0, 8.0, 2.9, 5.568, 1920, 3000, 150, 600, 80, 2, 5)
+
+
+def _batch_inputs(n):
+    rng = np.random.default_rng(0)
+    return (rng.uniform(3, 12, n), 1920, rng.uniform(2, 25, n), rng.uniform(1.4, 16, n),
+            rng.uniform(1.5, 6, n), rng.uniform(500, 10000, n), 150, 600, 80)
+
+
+def _jpeg(side):
+    from PIL import Image
+
+    rng = np.random.default_rng(side)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (side, side, 3), dtype=np.uint8)).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+def bench_formulas_scalar():
+    return lambda: optics.evaluate(5.568, 1920, 8.0, 2.0, 2.9, 3000, 150, 600, 80)
+
+
+def bench_formulas_batch_1m():
+    args = _batch_inputs(1_000_000)
+    return lambda: optics.evaluate(*args)
+
+
+def bench_grid_search():
+    return lambda: adjust.search_grid.__wrapped__(*GRID_ARGS)
+
+
+def bench_grid_search_fine():
+    return lambda: adjust.search_grid.__wrapped__(*GRID_ARGS, f_step=0.1, apertures=adjust.THIRD_STOPS)
+
+
+def bench_exact_solver():
+    return lambda: adjust.solve_focal_intervals.__wrapped__(
+        adjust.THIRD_STOPS, 2.9, 5.568, 1920, 3000, 150, 600, 80)
+
+
+def _bench_pixelate(side):
+    import imaging
+
+    data = _jpeg(side)
+
+    def run():
+        source = imaging.decode_source(data)
+        return [imaging.pixelate(source, px) for px in (40, 80)]
+    return run
+
+
+def bench_pixelate_512():
+    return _bench_pixelate(512)
+
+
+def bench_pixelate_2048():
+    return _bench_pixelate(2048)
+
+
+def bench_pixelate_6000():
+    return _bench_pixelate(6000)
+
+
+def bench_dof_chart():
+    return lambda: dof_chart._render.__wrapped__(194.6, 300.0, 654.3)
+
+
+def bench_occupancy_bar():
+    import render
+
+    return lambda: render.occupancy_bar_png.__wrapped__(99.5)
+
+
+BENCHMARKS = {name[len("bench_"):]: fn for name, fn in globals().items() if name.startswith("bench_")}
+
+
+def measure(make, repeat=5, min_time=0.2):
+    fn = make()
+    fn()  # 預熱 (lazy import、字型載入等)
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number for t in timer.repeat(repeat, number)]
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"best_s": min(runs), "median_s": statistics.median(runs), "loops": number, "peak_bytes": peak}
+
+
+def _fmt_time(s):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if s >= scale:
+            return f"{s / scale:7.2f} {unit}"
+    return f"{s / 1e-9:7.2f} ns"
+
+
+def compare(results, base, threshold):
+    """Names of cases that regressed by more than threshold× against base."""
+    worse = []
+    for name, r in results.items():
+        b = base.get("results", {}).get(name)
+        if not b:
+            continue
+        t_ratio = r["best_s"] / b["best_s"]
+        m_ratio = (r["peak_bytes"] + 1) / (b["peak_bytes"] + 1)
+        flag = t_ratio > threshold or m_ratio > threshold
+        print(f"  {name:<22} time ×{t_ratio:5.2f}  peak ×{m_ratio:5.2f}{'  ← REGRESSION' if flag else ''}")
+        if flag:
+            worse.append(name)
+    return worse
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("-k", dest="filter", default="", help="only cases whose name contains this")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--json", help="write results to this file")
+    p.add_argument("--compare", help="results file from an earlier run")
+    p.add_argument("--threshold", type=float, default=1.25, help="allowed slowdown/growth ratio")
+    a = p.parse_args(argv)
+
+    results = {}
+    print(f"{'case':<22} {'best':>10} {'median':>10} {'peak mem':>10}")
+    for name, make in BENCHMARKS.items():
+        if a.filter not in name:
+            continue
+        r = results[name] = measure(make, a.repeat)
+        print(f"{name:<22} {_fmt_time(r['best_s']):>10} {_fmt_time(r['median_s']):>10} "
+              f"{r['peak_bytes'] / 2**20:7.2f} MB")
+
+    if a.json:
+        with open(a.json, "w") as fh:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "machine": platform.machine(), "results": results}, fh, indent=2)
+    if a.compare:
+        with open(a.compare) as fh:
+            base = json.load(fh)
+        print(f"Against {a.compare} (threshold ×{a.threshold})")
+        if compare(results, base, a.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
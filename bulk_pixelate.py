@@ -0,0 +1,158 @@
+"""Bulk face-image pixelation for recognition-accuracy studies.
+
+    python bulk_pixelate.py faces/ store/ --widths 20:120:10 [--computed ...]
+
+Each image is pixelated at every width with the same scheme as the page
+(center square, BILINEAR down to px × px). The px × px results go into
+one memory-mapped array per width, store/w{px}.npy, with shape
+(n_images, px, px, 3) uint8. Blowing them up with NEAREST gives exactly the
+page's preview. store/done.npy marks finished images, so an interrupted
+run resumes where it stopped. Images that cannot be decoded (corrupt,
+unsupported or too large) are marked done and flagged in store/failed.npy,
+with their rows left black. They are listed at the end of the run, and a
+resumed run does not retry them.
+
+--computed adds the px_for_18cm width of a camera (h_res, pixel size µm,
+focal length mm, distance cm), computed with the page's formula.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import imaging
+import optics
+
+MANIFEST = "manifest.json"
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+TASK_IMAGES = 64
+
+
+def list_images(folder):
+    files = []
+    for root, _, names in os.walk(folder):
+        for name in names:
+            if name.lower().endswith(IMAGE_EXTS):
+                files.append(os.path.relpath(os.path.join(root, name), folder))
+    return sorted(files)
+
+
+def parse_widths(spec):
+    """'20:120:10' → 20, 30, …, 120; '40,80' → 40, 80."""
+    if ":" in spec:
+        start, stop, step = (int(x) for x in spec.split(":"))
+        return list(range(start, stop + 1, step))
+    return [int(x) for x in spec.split(",")]
+
+
+def _array_path(store, px):
+    return os.path.join(store, f"w{px}.npy")
+
+
+def _open_flags(store, name, n):
+    path = os.path.join(store, name)
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r+")
+    return np.lib.format.open_memmap(path, mode="w+", dtype=bool, shape=(n,))
+
+
+def open_store(store, files, widths):
+    """Create the store, or reopen it for resuming; returns the (done, failed) flags."""
+    os.makedirs(store, exist_ok=True)
+    manifest_path = os.path.join(store, MANIFEST)
+    manifest = {"files": files, "widths": widths}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as fh:
+            if json.load(fh) != manifest:
+                raise SystemExit(f"{store} was created for different images or widths")
+        return _open_flags(store, "done.npy", len(files)), _open_flags(store, "failed.npy", len(files))
+
+    for px in widths:
+        np.lib.format.open_memmap(_array_path(store, px), mode="w+", dtype=np.uint8,
+                                  shape=(len(files), px, px, 3))
+    done = _open_flags(store, "done.npy", len(files))
+    failed = _open_flags(store, "failed.npy", len(files))
+    with open(manifest_path, "w") as fh:
+        json.dump(manifest, fh)
+    return done, failed
+
+
+def load(store, px):
+    """Read-only memmap of the px-wide results, shape (n_images, px, px, 3)."""
+    return np.load(_array_path(store, px), mmap_mode="r")
+
+
+def _process(folder, store, items, widths):
+    # worker：各自開啟 memmap 直接寫入，回傳完成的索引與失敗的 (索引, 訊息)
+    arrays = {px: np.load(_array_path(store, px), mmap_mode="r+") for px in widths}
+    finished, failed = [], []
+    for i, name in items:
+        try:
+            with open(os.path.join(folder, name), "rb") as fh:
+                source = imaging.decode_source(fh.read(), side=max(imaging.SOURCE_PX, max(widths)))
+            source = source.convert("RGB")
+            for px in widths:
+                arrays[px][i] = np.asarray(imaging.downscale(source, px))
+        except Exception as e:  # 單張壞圖不中斷整批
+            failed.append((i, f"{type(e).__name__}: {e}"))
+        finished.append(i)
+    for arr in arrays.values():
+        arr.flush()
+    return finished, failed
+
+
+def run(folder, store, widths, workers=None, log=sys.stderr):
+    """Pixelate what is left to do; returns (images processed, seconds, failed file names)."""
+    files = list_images(folder)
+    widths = sorted(set(widths))
+    done, failed = open_store(store, files, widths)
+    todo = np.flatnonzero(~done)
+    print(f"{len(files):,} images, {len(todo):,} to do, widths {widths}", file=log)
+
+    tasks = [[(i, files[i]) for i in todo[k:k + TASK_IMAGES]] for k in range(0, len(todo), TASK_IMAGES)]
+    start = time.perf_counter()
+    count = 0
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(_process, folder, store, t, widths) for t in tasks]
+        for fut in concurrent.futures.as_completed(futures):
+            finished, errors = fut.result()
+            for i, message in errors:
+                failed[i] = True
+                print(f"failed: {files[i]}: {message}", file=log)
+            failed.flush()
+            done[finished] = True
+            done.flush()
+            count += len(finished)
+            rate = count / (time.perf_counter() - start)
+            print(f"{count:,}/{len(todo):,} images  {rate:,.1f} images/s", file=log)
+    return count, time.perf_counter() - start, [files[i] for i in np.flatnonzero(failed)]
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("folder", help="folder of face images (searched recursively)")
+    p.add_argument("store", help="output store directory")
+    p.add_argument("--widths", default="20:120:10", help="'start:stop:step' or comma list")
+    p.add_argument("--computed", nargs=4, type=float, metavar=("H_RES", "PIXEL_UM", "FOCAL_MM", "DIST_CM"),
+                   help="also pixelate at this camera's px_for_18cm")
+    p.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    a = p.parse_args(argv)
+
+    widths = parse_widths(a.widths)
+    if a.computed:
+        widths.append(int(optics.face_pixels(*a.computed)))
+    count, seconds, failed = run(a.folder, a.store, widths, a.workers)
+    print(f"done: {count:,} images in {seconds:.1f} s ({count / max(seconds, 1e-9):,.1f} images/s)",
+          file=sys.stderr)
+    if failed:
+        print(f"{len(failed):,} image(s) could not be read (rows left black, see failed.npy):", file=sys.stderr)
+        for name in failed:
+            print(f"  {name}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
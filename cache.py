@@ -0,0 +1,145 @@
+"""Process-wide result caches shared by every Streamlit session.
+
+camera_web.py runs again on each rerun, but imported modules load once per
+server process. Caches defined here are therefore shared across sessions.
+Each cache is an LRU bounded by entry count and/or bytes, with an optional
+TTL. Keys are normalized input tuples, so 8 and 8.0 and np.float64(8) hit
+the same entry.
+"""
+import functools
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+_MISSING = object()
+
+
+def normalize(value):
+    """Hashable, canonical form of a cache-key component."""
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return float(value)
+    if isinstance(value, (float, np.floating)):
+        # 12 位有效數字：過濾浮點雜訊，8 與 8.0 視為同一鍵
+        return float(f"{float(value):.12g}")
+    if isinstance(value, np.ndarray):
+        return tuple(normalize(v) for v in value.ravel().tolist()) + (value.shape,)
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return hashlib.sha1(value).hexdigest()
+    return value
+
+
+def sizeof(value):
+    """Approximate bytes held by a cached value."""
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    if hasattr(value, "getbands"):  # PIL image
+        return value.width * value.height * len(value.getbands())
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU with entry/byte bounds, TTL and hit/miss counters."""
+
+    def __init__(self, name, max_entries=1024, max_bytes=None, ttl=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def _drop(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING and item[2] is not None and item[2] < time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                item = _MISSING
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key, value):
+        size = sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value  # 單筆超過上限就不快取
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._data and (
+                len(self._data) > self.max_entries
+                or (self.max_bytes is not None and self._bytes > self.max_bytes)
+            ):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.put(key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def memoize(cache):
+    """Cache a function's results in `cache`, keyed on its normalized arguments."""
+    def decorator(func):
+        prefix = (func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = prefix + (normalize(args), normalize(sorted(kwargs.items())))
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+METRICS = LRUCache("metrics", max_entries=4096, max_bytes=64 * 1024 * 1024, ttl=3600)
+RENDERS = LRUCache("renders", max_entries=2048, max_bytes=16 * 1024 * 1024, ttl=3600)
+PREVIEWS = LRUCache("previews", max_entries=256, max_bytes=64 * 1024 * 1024, ttl=3600)
+
+
+def stats():
+    return {c.name: c.stats() for c in (METRICS, RENDERS, PREVIEWS)}
@@ -0,0 +1,152 @@
+"""Sensor × lens catalog search for recognition-compliant configurations.
+
+Pixels across a face at distance D are (1000 / pixel_size) · w · f / (D - f).
+So for each sensor the face-pixel rule is a lower bound on focal length. The
+catalog keeps lenses sorted by focal length and finds each sensor's
+compliant range with one binary search. Only the surviving pairs get the
+DoF check, so queries over millions of combinations skip the full scan.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+import adjust
+import cache
+import optics
+
+# 候選組合分塊計算，限制記憶體
+BLOCK_PAIRS = 2_000_000
+
+
+class Catalog:
+    """Sensors (h_res, v_res, pixel_size or sensor_width) and lenses
+    (focal_length, f_min, f_max f-numbers), indexed for query()."""
+
+    def __init__(self, sensors, lenses):
+        s = sensors.reset_index(drop=True).copy()
+        if "name" not in s:
+            s["name"] = [f"sensor {i}" for i in range(len(s))]
+        h_res = s["h_res"].to_numpy(dtype=float)
+        if "pixel_size" not in s:
+            s["pixel_size"] = optics.pixel_size_from_width(s["sensor_width"].to_numpy(dtype=float), h_res)
+        if "sensor_width" not in s:
+            s["sensor_width"] = optics.sensor_width_from_pixel(s["pixel_size"].to_numpy(dtype=float), h_res)
+        if "v_res" in s:
+            s["optical_format"] = optics.optical_format(optics.optical_inch(
+                s["sensor_width"].to_numpy(dtype=float),
+                optics.sensor_height(s["pixel_size"].to_numpy(dtype=float), s["v_res"].to_numpy(dtype=float)),
+            ))
+        self.sensors = s
+
+        l = lenses.sort_values("focal_length", kind="stable").reset_index(drop=True).copy()
+        if "name" not in l:
+            l["name"] = [f"{f:g} mm lens" for f in l["focal_length"]]
+        self.lenses = l
+        self._f = l["focal_length"].to_numpy(dtype=float)
+        self._n_min = l["f_min"].to_numpy(dtype=float)
+        self._n_max = l["f_max"].to_numpy(dtype=float)
+        self._pixel_size = s["pixel_size"].to_numpy(dtype=float)
+        self._h_res = s["h_res"].to_numpy(dtype=float)
+        self._sensor_width = s["sensor_width"].to_numpy(dtype=float)
+
+    @classmethod
+    def from_csv(cls, sensors_csv, lenses_csv):
+        return cls(pd.read_csv(sensors_csv), pd.read_csv(lenses_csv))
+
+    def __len__(self):
+        return len(self.sensors) * len(self.lenses)
+
+    def __sizeof__(self):
+        # DataFrame 加上查詢用的 numpy 副本，讓 cache.sizeof 反映實際資料量
+        frames = self.sensors.memory_usage(deep=True).sum() + self.lenses.memory_usage(deep=True).sum()
+        arrays = (self._f, self._n_min, self._n_max, self._pixel_size, self._h_res, self._sensor_width)
+        return int(frames) + sum(a.nbytes for a in arrays)
+
+    def _candidates(self, distance_mm, face_px):
+        # px >= face_px  ⇔  m >= m_req(sensor)  ⇔  f >= m_req·D / (1 + m_req)
+        m_req = face_px * self._sensor_width / (optics.FACE_WIDTH_CM * 10 * self._h_res)
+        f_req = m_req * distance_mm / (1 + m_req)
+        lo = np.searchsorted(self._f, f_req, side="left")
+        hi = np.searchsorted(self._f, distance_mm, side="left")  # f 必須小於拍攝距離
+        return lo, np.maximum(hi - lo, 0)
+
+    def query(self, distance_cm=optics.TEST_MM / 10, face_px=optics.FACE_PIXELS,
+              near_cm=50.0, far_cm=1500.0, focus_cm=None, stops=adjust.THIRD_STOPS):
+        """All sensor/lens pairs with >= face_px on an 18 cm face at distance_cm
+        whose DoF covers near_cm..far_cm at some stop in the lens's range.
+
+        focus_cm=None focuses each pair where its far limit just reaches
+        far_cm (the best possible near limit); otherwise the focus is fixed.
+        Each result row reports the widest-aperture stop that passes.
+        """
+        distance_mm = distance_cm * 10
+        lo, counts = self._candidates(distance_mm, face_px)
+        stops = np.sort(np.asarray(stops, dtype=float))
+        found = []
+        starts = np.cumsum(counts) - counts
+        s0 = 0
+        while s0 < len(counts):
+            # 依候選數分塊，每塊最多 BLOCK_PAIRS 組 (至少一個 sensor)
+            s1 = max(s0 + 1, int(np.searchsorted(starts, starts[s0] + BLOCK_PAIRS, side="left")))
+            c = counts[s0:s1]
+            si = np.repeat(np.arange(s0, s1), c)
+            li = np.arange(c.sum()) - np.repeat(np.cumsum(c) - c, c) + np.repeat(lo[s0:s1], c)
+            found.append(self._check_dof(si, li, near_cm, far_cm, focus_cm, stops))
+            s0 = s1
+        si, li, N, u = (np.concatenate(x) for x in zip(*found)) if found else ([],) * 4
+        return self._results(np.asarray(si, dtype=int), np.asarray(li, dtype=int),
+                             np.asarray(N, dtype=float), np.asarray(u, dtype=float), distance_mm)
+
+    def _check_dof(self, si, li, near_cm, far_cm, focus_cm, stops):
+        f = self._f[li]
+        pixel_size = self._pixel_size[si]
+
+        def passes(k):
+            # DoF 隨 f-number 單調變大，可對標準光圈二分搜尋
+            N = stops[k]
+            C = optics.coc_mm(N, pixel_size)
+            if focus_cm is None:
+                u = optics.focus_for_far_limit(f, N, C, far_cm * 10)
+                Dn, _ = optics.dof_limits(f, N, C, u)
+                return (Dn / 10 <= near_cm) & (u > f), u
+            u = np.full(len(f), focus_cm * 10)
+            Dn, Df = optics.dof_limits(f, N, C, u)
+            return optics.covers_range(Dn, Df, near_cm, far_cm), u
+
+        lo = np.searchsorted(stops, self._n_min[li], side="left")
+        hi = np.searchsorted(stops, self._n_max[li], side="right") - 1
+        keep = lo <= hi
+        ok, _ = passes(np.where(keep, hi, 0))
+        keep &= ok
+        si, li, f, pixel_size, lo, hi = si[keep], li[keep], f[keep], pixel_size[keep], lo[keep], hi[keep]
+        while np.any(lo < hi):
+            mid = (lo + hi) // 2
+            ok, _ = passes(mid)
+            hi = np.where(ok, mid, hi)
+            lo = np.where(ok, lo, mid + 1)
+        _, u = passes(hi)
+        return si, li, stops[hi], u
+
+    def _results(self, si, li, N, u, distance_mm):
+        s = self.sensors.iloc[si].reset_index(drop=True)
+        l = self.lenses.iloc[li].reset_index(drop=True)
+        C = optics.coc_mm(N, self._pixel_size[si])
+        Dn, Df = optics.dof_limits(self._f[li], N, C, u)
+        px = optics.pixels_at_distance(self._sensor_width[si], self._h_res[si], self._f[li], distance_mm)
+        return pd.DataFrame({
+            "sensor": s["name"],
+            "lens": l["name"],
+            "focal_length": self._f[li],
+            "f_number": N,
+            "face_px": px,
+            "focus_cm": u / 10,
+            "near_cm": Dn / 10,
+            "far_cm": Df / 10,
+        })
+
+
+@cache.memoize(cache.METRICS)
+def load_catalog(sensors_csv, lenses_csv):
+    """Catalog from CSV bytes; cached so every session shares one index."""
+    return Catalog.from_csv(io.BytesIO(sensors_csv), io.BytesIO(lenses_csv))
@@ -0,0 +1,97 @@
+"""Multi-camera site coverage on a 2-D floor plan.
+
+Each camera has a position, a yaw and a lens/sensor. For every floor-grid
+point, the page's magnification formula gives the pixels across an 18 cm
+face along the camera axis, and the DoF formulas tell whether the point is
+in focus. Cameras are evaluated only over the grid bounding box of their
+frustum, cut at the range where faces drop below min_px. Floor
+coordinates are in metres. Results are memoized on the camera tuples,
+extent and grid shape.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+import cache
+import optics
+
+
+class Camera(NamedTuple):
+    x: float              # m
+    y: float              # m
+    yaw_deg: float        # 0 = +x, counter-clockwise
+    focal_length: float   # mm
+    sensor_width: float   # mm
+    h_res: int
+    pixel_size: float     # µm
+    f_number: float = 2.0
+    focus_m: float = 5.0
+
+
+class Coverage(NamedTuple):
+    xs: np.ndarray         # (W,) grid x (m)
+    ys: np.ndarray         # (H,) grid y (m)
+    best_px: np.ndarray    # (H, W) best face pixels over in-focus cameras (0 = none)
+    cameras: np.ndarray    # (H, W) number of cameras seeing the point in focus
+    compliant: np.ndarray  # (H, W) best_px >= required_px
+
+
+def _range_mm(cam, min_px):
+    # 臉部像素降到 min_px 的距離：px ∝ f/(d-f)，解 d
+    m_min = min_px * cam.sensor_width / (optics.FACE_WIDTH_CM * 10 * cam.h_res)
+    return cam.focal_length / m_min + cam.focal_length
+
+
+@cache.memoize(cache.METRICS)
+def compute(cameras, extent, shape=(1000, 1000), required_px=optics.FACE_PIXELS, min_px=20.0):
+    """Coverage of cameras over extent = (x0, x1, y0, y1) metres on a shape = (H, W) grid."""
+    x0, x1, y0, y1 = extent
+    H, W = shape
+    xs = np.linspace(x0, x1, W)
+    ys = np.linspace(y0, y1, H)
+    best = np.zeros(shape, dtype=np.float32)
+    count = np.zeros(shape, dtype=np.int16)
+
+    for cam in cameras:
+        f = cam.focal_length
+        C = optics.coc_mm(cam.f_number, cam.pixel_size)
+        Dn, Df = optics.dof_limits(f, cam.f_number, C, cam.focus_m * 1000)
+        d_max = min(float(Df), _range_mm(cam, min_px)) / 1000  # m
+        half = np.arctan(cam.sensor_width / (2 * f))  # 半視角 (遠距近似，只用於裁切)
+        yaw = np.radians(cam.yaw_deg)
+
+        # 視錐三角形的外接矩形 → 網格索引範圍
+        corners_x = cam.x + d_max / np.cos(half) * np.cos([yaw - half, yaw + half])
+        corners_y = cam.y + d_max / np.cos(half) * np.sin([yaw - half, yaw + half])
+        bx = (min(cam.x, *corners_x), max(cam.x, *corners_x))
+        by = (min(cam.y, *corners_y), max(cam.y, *corners_y))
+        i0, i1 = np.searchsorted(xs, bx[0]), np.searchsorted(xs, bx[1], side="right")
+        j0, j1 = np.searchsorted(ys, by[0]), np.searchsorted(ys, by[1], side="right")
+        if i0 >= i1 or j0 >= j1:
+            continue
+
+        dx = (xs[i0:i1] - cam.x)[None, :] * 1000  # mm
+        dy = (ys[j0:j1] - cam.y)[:, None] * 1000
+        d = dx * np.cos(yaw) + dy * np.sin(yaw)       # 沿光軸距離
+        lat = -dx * np.sin(yaw) + dy * np.cos(yaw)    # 橫向偏移
+        with np.errstate(divide="ignore", invalid="ignore"):
+            px = optics.pixels_at_distance(cam.sensor_width, cam.h_res, f, d)
+            half_width = optics.hfov_at_distance(cam.sensor_width, f, d) / 2
+        seen = (d > f) & (np.abs(lat) <= half_width) & (d >= Dn) & (d <= Df) & (px >= min_px)
+
+        sub_best = best[j0:j1, i0:i1]
+        np.maximum(sub_best, np.where(seen, px, 0).astype(np.float32), out=sub_best)
+        count[j0:j1, i0:i1] += seen
+
+    return Coverage(xs, ys, best, count, best >= required_px)
+
+
+def heatmap_rgb(cov, required_px=optics.FACE_PIXELS):
+    """RGB uint8 image (north up): green = compliant, orange = seen but too few
+    pixels, grey = not covered. Brightness follows best_px."""
+    level = np.clip(cov.best_px / (2 * required_px), 0, 1)[..., None]
+    green = np.array([40, 160, 40]) + level * np.array([60, 95, 60])
+    orange = np.array([200, 110, 30]) + level * np.array([55, 80, 40])
+    grey = np.array([200, 200, 200])
+    img = np.where(cov.compliant[..., None], green, np.where((cov.best_px > 0)[..., None], orange, grey))
+    return img[::-1].astype(np.uint8)
@@ -0,0 +1,89 @@
+"""Depth of Field chart rendered as inline SVG.
+
+Replaces the 18000×1200 px matplotlib PNG: the browser draws the chart, the
+payload is a few KB, and identical (near, subject, far) triples are served
+from the shared render cache.
+"""
+import logging
+import math
+
+import cache
+
+log = logging.getLogger("camera_web.dof_chart")
+
+MAX_PLOT_CM = 1500
+WIDTH_PX = 3000
+HEIGHT_PX = 200
+PAYLOAD_BUDGET_BYTES = 8 * 1024  # 超過只記警告，圖仍照常顯示
+
+_BAND = "#add8e6"  # lightblue
+
+
+def _x(cm):
+    return round(cm / MAX_PLOT_CM * WIDTH_PX, 1)
+
+
+def _y(frac):
+    # axes fraction (0 = bottom) → SVG y (0 = top)
+    return round((1 - frac) * HEIGHT_PX, 1)
+
+
+def _text(x, y, lines, size, anchor="middle", color="black", bold=False):
+    # 多行文字底部對齊 y，與 matplotlib va='bottom' 相同
+    weight = ' font-weight="bold"' if bold else ""
+    line_h = round(size * 1.2, 1)
+    y0 = round(y - line_h * (len(lines) - 1), 1)
+    spans = "".join(
+        f'<tspan x="{x}" dy="{0 if i == 0 else line_h}">{line}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text x="{x}" y="{y0}" font-size="{size}" text-anchor="{anchor}" '
+            f'fill="{color}"{weight}>{spans}</text>')
+
+
+@cache.memoize(cache.RENDERS)
+def _render(near_cm, subject_cm, far_cm_raw):
+    far_cm = min(far_cm_raw, MAX_PLOT_CM)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH_PX}" height="{HEIGHT_PX}" '
+        f'viewBox="0 0 {WIDTH_PX} {HEIGHT_PX}" font-family="sans-serif" style="display:block">',
+        f'<rect width="{WIDTH_PX}" height="{HEIGHT_PX}" fill="{_BAND}" fill-opacity="0.2"/>',
+        f'<rect x="{_x(near_cm)}" width="{max(round(_x(far_cm) - _x(near_cm), 1), 0)}" '
+        f'height="{HEIGHT_PX}" fill="{_BAND}" fill-opacity="0.8"/>',
+        _text(4, _y(0.5) + 8, ["📷 Camera"], 20, anchor="start"),
+        f'<circle cx="{_x(subject_cm)}" cy="{_y(0.5)}" r="5" fill="red"/>',
+        _text(_x(subject_cm), _y(0.6), ["🎯 Focus Target", f"{subject_cm:.1f} cm"], 20, color="red"),
+        _text(_x(near_cm), _y(0.05), ["Near", f"{near_cm:.1f} cm"], 16, bold=True),
+    ]
+    if not math.isinf(far_cm_raw):
+        display_far = (
+            f"{far_cm:.1f} cm" if far_cm_raw <= MAX_PLOT_CM else f"{far_cm_raw / 100:.1f} m"
+        )
+        parts.append(_text(_x(max(far_cm - 10, 0)), _y(0.05), ["Far", display_far], 16, bold=True))
+        if far_cm_raw < MAX_PLOT_CM:
+            parts.append(_text(WIDTH_PX - 4, _y(0.05), ["infinity"], 16, anchor="end", bold=True))
+    else:
+        parts.append(_text(WIDTH_PX - 4, _y(0.05), ["Far", "infinity"], 16, anchor="end", bold=True))
+    parts.append("</svg>")
+
+    svg = "".join(parts)
+    size = len(svg.encode())
+    if size > PAYLOAD_BUDGET_BYTES:
+        log.warning("DoF chart is %d bytes, over the %d byte budget", size, PAYLOAD_BUDGET_BYTES)
+    return svg
+
+
+def dof_svg(near_cm, subject_cm, far_cm_raw):
+    """SVG markup for the DoF band; far_cm_raw may be inf.
+
+    Inputs are rounded to the 0.1 cm shown in the labels, so reruns and
+    sessions that display the same chart hit the cache.
+    """
+    far_key = math.inf if math.isinf(far_cm_raw) else round(float(far_cm_raw), 1)
+    return _render(round(float(near_cm), 1), round(float(subject_cm), 1), far_key)
+
+
+def dof_html(near_cm, subject_cm, far_cm_raw):
+    """dof_svg wrapped in the horizontally scrolling container used on the page."""
+    return (f'<div style="width:100%; overflow-x:auto;">'
+            f'{dof_svg(near_cm, subject_cm, far_cm_raw)}</div>')
@@ -0,0 +1,77 @@
+"""Face pixelation previews for the Face Clarity Comparison section.
+
+An upload is decoded once into a small square source image. JPEGs are
+decoded at reduced resolution (draft mode). The source is cached by content
+hash, and every preview is resampled from it, so peak memory per upload is
+bounded by MAX_DECODE_PIXELS, not by the file's resolution.
+"""
+import hashlib
+import io
+
+from PIL import Image
+
+import cache
+
+PREVIEW_PX = 256
+SOURCE_PX = 1024              # 共用中間影像邊長
+MAX_DECODE_PIXELS = 50_000_000  # 無法 draft 的格式 (PNG) 最多解碼這麼多像素
+
+
+def digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def center_square(img):
+    # 讀取並裁切正方形
+    w, h = img.size
+    m = min(w, h)
+    return img.crop(((w-m)//2, (h-m)//2, (w+m)//2, (h+m)//2))
+
+
+def downscale(im, px):
+    """The px×px BILINEAR reduction that pixelate() blows back up."""
+    return im.resize((int(px), int(px)), resample=Image.BILINEAR)
+
+
+def pixelate(im, px, size=PREVIEW_PX):
+    """Downscale to px×px (BILINEAR), then blow back up with NEAREST."""
+    return downscale(im, px).resize((size, size), resample=Image.NEAREST)
+
+
+def decode_source(data, side=SOURCE_PX):
+    """Center-square crop of the image in `data`, at most side×side."""
+    img = Image.open(io.BytesIO(data))
+    w, h = img.size
+    if img.format == "JPEG":
+        # DCT 縮放解碼：只解到略大於需要的解析度
+        scale = side / min(w, h)
+        img.draft("RGB", (max(1, int(w * scale)), max(1, int(h * scale))))
+    elif w * h > MAX_DECODE_PIXELS:
+        raise ValueError(f"Image too large to preview ({w}×{h}); please upload a JPEG or a smaller image")
+    img = center_square(img)
+    if img.width > side:
+        img = img.resize((side, side), resample=Image.BILINEAR)
+    else:
+        img.load()
+    return img
+
+
+def source_image(data, key=None):
+    """Cached decode_source(data); key is the content digest if already known."""
+    key = key or digest(data)
+    return cache.PREVIEWS.get_or_compute(("source", key), lambda: decode_source(data))
+
+
+def pixelated_previews(data, px_values, key=None):
+    """Pixelated previews of uploaded image bytes, one per entry of px_values.
+
+    All previews come from the one cached source image. Results are keyed
+    on the upload's digest and pixel widths, so any session showing the
+    same image and camera reuses them.
+    """
+    key = key or digest(data)
+    px_values = tuple(int(px) for px in px_values)
+    return cache.PREVIEWS.get_or_compute(
+        ("previews", key, px_values),
+        lambda: tuple(pixelate(source_image(data, key), px) for px in px_values),
+    )
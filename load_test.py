@@ -0,0 +1,232 @@
+"""Concurrent-session load test of camera_web.py, headless via AppTest.
+
+    python load_test.py [--sessions 8 --rounds 3 --json out.json]
+
+Each simulated session is its own process with its own AppTest. AppTest
+swaps a global Runtime per run, so sessions cannot share one process. They
+start together behind a barrier and compete for the same CPUs. The
+process-wide caches are per session here, so cross-session cache hits a
+real server would get are not counted. A session enters resolution and
+pixel size, picks a focal length, distance and focus, sets the DoF limits,
+uploads a face image and moves the adjustment slider. Later rounds change
+the focal length and slider again. Every widget change is one timed rerun;
+a slider move when the page shows no slider is skipped and counted instead.
+Sessions that fail to start within --start-timeout, or die without
+reporting, are listed as errors.
+
+Reported: p50/p95/p99 rerun latency (overall and per step), and CPU time
+and RSS growth per session, measured inside each session process after
+imports (RSS from /proc on Linux, otherwise peak RSS).
+"""
+import argparse
+import collections
+import io
+import importlib
+import json
+import os
+import queue
+import resource
+import sys
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "camera_web.py")
+PERCENTILES = (50, 95, 99)
+WARM_IMPORTS = ("pandas", "optics", "adjust", "dof_chart", "render", "imaging")
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss：Linux 為 KB，macOS 為 bytes
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def face_jpeg(seed, side=1200):
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    buf = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (side, side, 3), dtype=np.uint8)).save(buf, "JPEG", quality=85)
+    return buf.getvalue()
+
+
+def _number(at, label):
+    return next(w for w in at.number_input if w.label == label)
+
+
+def steps(rng, image, rounds):
+    """(step name, action on AppTest) pairs for one session."""
+    focal = float(rng.choice([4.0, 6.0, 8.0, 12.0]))
+    yield "h_res", lambda at: _number(at, "Horizontal resolution (pixels)").set_value(int(rng.choice([1280, 1920, 2560])))
+    yield "v_res", lambda at: _number(at, "Vertical resolution (pixels)").set_value(1080)
+    yield "pixel_size", lambda at: at.text_input[1].set_value(f"{rng.uniform(1.5, 4.0):.2f}")
+    yield "focal_length", lambda at: _number(at, "Focal length (mm)").set_value(focal)
+    yield "distance", lambda at: _number(at, "Distance (cm)").set_value(float(rng.integers(200, 800)))
+    yield "focus", lambda at: _number(at, "Focus at the subject distance (cm)").set_value(float(rng.integers(150, 500)))
+    yield "dof_limits", lambda at: _number(at, "Desired near limit (cm)").set_value(150.0)
+    yield "upload", lambda at: next(w for w in at.file_uploader if w.label.startswith("Upload a face")).set_value(
+        ("face.jpg", image, "image/jpeg"))
+    for _ in range(rounds):
+        yield "slider", lambda at: _move_slider(at, rng)
+        yield "slider", lambda at: _move_slider(at, rng)
+        yield "focal_length", lambda at: _number(at, "Focal length (mm)").set_value(
+            float(np.clip(focal + rng.uniform(-2, 2), 1, 50)))
+
+
+def _move_slider(at, rng):
+    """Move the adjustment slider; False (step skipped, no rerun) if the page shows none."""
+    if not len(at.slider):
+        return False
+    s = at.slider[0]
+    s.set_value(int(rng.integers(s.min, s.max + 1)))
+
+
+def _report(i, out=(), skipped=(), cpu=0.0, rss=0, error=None):
+    return i, list(out), list(skipped), cpu, rss, error
+
+
+def run_session(i, seed, image, rounds, timeout, start_timeout, barrier, results):
+    try:
+        from streamlit.testing.v1 import AppTest
+
+        for module in WARM_IMPORTS:  # 伺服器行程只付一次的 import 成本不計入延遲
+            importlib.import_module(module)
+        os.chdir(HERE)  # 頁面以相對路徑開啟 optical_diagram.png
+        rng = np.random.default_rng([seed, i])
+        at = AppTest.from_file(APP, default_timeout=timeout)
+    except Exception as e:
+        barrier.abort()  # 其他 session 不必等到逾時
+        results.put(_report(i, error=f"session {i}: setup failed: {type(e).__name__}: {e}"))
+        return
+    try:
+        barrier.wait(start_timeout)
+    except threading.BrokenBarrierError:
+        results.put(_report(i, error=f"session {i}: did not start (another session failed or the start timed out)"))
+        return
+
+    out, skipped, error = [], [], None
+    rss0, cpu0 = rss_bytes(), time.process_time()
+    try:
+        t = time.perf_counter()
+        at.run()
+        out.append(("initial", time.perf_counter() - t))
+        for name, action in steps(rng, image, rounds):
+            if action(at) is False:
+                skipped.append(name)
+                continue
+            t = time.perf_counter()
+            at.run()
+            out.append((name, time.perf_counter() - t))
+            if at.exception:
+                raise RuntimeError(f"step {name}: {at.exception[0].message}")
+    except Exception as e:
+        error = f"session {i}: {type(e).__name__}: {e}"
+    results.put(_report(i, out, skipped, time.process_time() - cpu0, rss_bytes() - rss0, error))
+
+
+def collect(procs, results, poll=1.0):
+    """Reports of every session; a session that exits without one is reported dead."""
+    reports, dead = [], []
+    pending, suspect = set(range(len(procs))), set()
+    while pending:
+        try:
+            r = results.get(timeout=poll)
+        except queue.Empty:
+            # 行程結束時佇列可能還沒送完；連續兩次輪詢都沒收到才算死亡
+            gone = {i for i in pending if not procs[i].is_alive()}
+            for i in sorted(gone & suspect):
+                dead.append(f"session {i}: exited with code {procs[i].exitcode} without a report")
+            pending -= gone & suspect
+            suspect = gone
+            continue
+        reports.append(r)
+        pending.discard(r[0])
+    return reports, dead
+
+
+def run(sessions, rounds=3, seed=0, images=4, timeout=300, start_timeout=120):
+    ctx = multiprocessing.get_context("spawn")
+    corpus = [face_jpeg(seed + k) for k in range(images)]
+    barrier = ctx.Barrier(sessions + 1)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=run_session,
+                         args=(i, seed, corpus[i % images], rounds, timeout, start_timeout, barrier, results))
+             for i in range(sessions)]
+    for p in procs:
+        p.start()
+    try:
+        barrier.wait(start_timeout)
+    except threading.BrokenBarrierError:
+        pass  # 各 session 會回報未能開始
+    wall0 = time.perf_counter()
+    reports, dead = collect(procs, results)
+    wall = time.perf_counter() - wall0
+    for p in procs:
+        p.join()
+
+    by_step = collections.defaultdict(list)
+    skipped = collections.Counter()
+    for _, out, skip, _, _, _ in reports:
+        for name, dt in out:
+            by_step[name].append(dt)
+        skipped.update(skip)
+    all_dt = np.array([dt for _, out, _, _, _, _ in reports for _, dt in out])
+    cpu = np.array([r[3] for r in reports if r[1]])
+    rss = np.array([r[4] for r in reports if r[1]])
+    pct = lambda xs: dict(zip((f"p{p}" for p in PERCENTILES), np.percentile(xs, PERCENTILES).tolist()))
+    return {
+        "sessions": sessions,
+        "reruns": len(all_dt),
+        "errors": [r[5] for r in sorted(reports) if r[5]] + dead,
+        "wall_s": wall,
+        "reruns_per_s": len(all_dt) / wall,
+        "latency_s": pct(all_dt) if len(all_dt) else {},
+        "steps": {name: {"n": len(xs), **pct(xs)} for name, xs in by_step.items()},
+        "skipped_steps": dict(skipped),
+        "cpu_s_per_session": float(cpu.mean()) if len(cpu) else float("nan"),
+        "rss_growth_bytes_per_session": float(rss.mean()) if len(rss) else float("nan"),
+        "rss_growth_bytes_max": float(rss.max()) if len(rss) else float("nan"),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--sessions", type=int, default=8, help="concurrent simulated sessions")
+    p.add_argument("--rounds", type=int, default=3, help="slider/focal-length rounds per session")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--timeout", type=float, default=300, help="per-rerun AppTest timeout (s)")
+    p.add_argument("--start-timeout", type=float, default=120, help="max wait for all sessions to start (s)")
+    p.add_argument("--json", help="write the report to this file")
+    a = p.parse_args(argv)
+
+    r = run(a.sessions, a.rounds, a.seed, timeout=a.timeout, start_timeout=a.start_timeout)
+    ms = lambda d: "  ".join(f"{k} {v * 1000:7.1f} ms" for k, v in d.items() if k.startswith("p"))
+    print(f"{r['sessions']} sessions, {r['reruns']} reruns in {r['wall_s']:.1f} s "
+          f"({r['reruns_per_s']:.1f} reruns/s)")
+    print(f"rerun latency     {ms(r['latency_s'])}")
+    for name, s in r["steps"].items():
+        print(f"  {name:<14} n={s['n']:<4} {ms(s)}")
+    for name, n in r["skipped_steps"].items():
+        print(f"  {name:<14} skipped {n}× (widget not on the page)")
+    print(f"CPU per session   {r['cpu_s_per_session']:.2f} s")
+    print(f"RSS per session   {r['rss_growth_bytes_per_session'] / 2**20:+.1f} MB "
+          f"(max {r['rss_growth_bytes_max'] / 2**20:+.1f} MB)")
+    for e in r["errors"]:
+        print(f"error: {e}", file=sys.stderr)
+    if a.json:
+        with open(a.json, "w") as fh:
+            json.dump(r, fh, indent=2)
+    if r["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
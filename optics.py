@@ -0,0 +1,220 @@
+"""Optics engine behind camera_web.py.
+
+Every function accepts scalars or NumPy arrays (broadcast against each other)
+and returns NumPy values, so the same formulas drive the Streamlit page and
+batch scoring of millions of configurations.
+
+Units: lengths in mm, pixel pitch in µm, angles in degrees, unless the
+argument name says otherwise.
+"""
+import numpy as np
+
+WAVELENGTH_UM = 0.55   # 綠光波長，用於 Airy disk
+FACE_WIDTH_CM = 18.0   # 人臉寬度
+FACE_PIXELS = 80.0     # 辨識所需像素
+TEST_MM = 5000.0       # Summary Check 的 5 m 測試點
+
+# 頁面、batch.py 與 service.py 共用的預設值
+FOCUS_CM = 100.0       # 對焦距離
+NEAR_CM = 50.0         # 期望景深近端
+FAR_CM = 1500.0        # 期望景深遠端
+
+# film (35mm) optical-format-inches
+FILM_INCH = float(np.hypot(36, 24) * 1.5 / 25.4)
+
+FORMATS = [
+    ("1/4″",       1/4),
+    ("1/3.6″",     1/3.6),
+    ("1/3.5″",     1/3.5),
+    ("1/3.2″",     1/3.2),
+    ("1/3″",       1/3),
+    ("1/2.8″",     1/2.8),
+    ("1/2.7″",     1/2.7),
+    ("1/2.5″",     1/2.5),
+    ("1/2″",       1/2),
+    ("1/1.8″",     1/1.8),
+    ("2/3″",       2/3),
+    ("1″",         1.0),
+    ("4/3″",       4/3),
+    ("35mm",       FILM_INCH),
+]
+_FORMAT_NAMES = np.array([name for name, _ in FORMATS])
+_FORMAT_INCHES = np.array([inch for _, inch in FORMATS])
+
+
+def _out(x):
+    # 0-d 陣列轉成 numpy scalar，方便 f-string 格式化
+    return x[()] if isinstance(x, np.ndarray) and x.ndim == 0 else x
+
+
+def _f(x):
+    return np.asarray(x, dtype=float)
+
+
+# --- Sensor ---
+
+def pixel_size_from_width(sensor_width, h_res):
+    """Pixel pitch (µm) from sensor width (mm) and horizontal resolution."""
+    return _out(_f(sensor_width) / h_res * 1000)
+
+
+def sensor_width_from_pixel(pixel_size, h_res):
+    """Sensor width (mm) from pixel pitch (µm) and horizontal resolution."""
+    return _out(h_res * (_f(pixel_size) / 1000))
+
+
+def sensor_height(pixel_size, v_res):
+    return _out((_f(pixel_size) / 1000) * v_res)
+
+
+def sensor_diagonal(sensor_width, sensor_height):
+    return _out(np.hypot(_f(sensor_width), sensor_height))
+
+
+def optical_inch(sensor_width, sensor_height):
+    return _out(sensor_diagonal(sensor_width, sensor_height) * 1.5 / 25.4)
+
+
+def optical_format(opt_inch):
+    """Name of the nearest entry in FORMATS."""
+    idx = np.argmin(np.abs(_f(opt_inch)[..., None] - _FORMAT_INCHES), axis=-1)
+    return _out(_FORMAT_NAMES[idx])
+
+
+# --- Field of view ---
+
+def hfov_deg(sensor_width, focal_length):
+    return _out(2 * np.degrees(np.arctan(_f(sensor_width) / (2 * focal_length))))
+
+
+def dfov_deg(sensor_width, sensor_height, focal_length):
+    diagonal = np.hypot(_f(sensor_width), sensor_height)
+    return _out(2 * np.degrees(np.arctan(diagonal / (2 * focal_length))))
+
+
+def focal_from_dfov(sensor_width, sensor_height, dfov_deg):
+    diagonal = np.hypot(_f(sensor_width), sensor_height)
+    return _out((diagonal / 2) / np.tan(np.radians(dfov_deg) / 2))
+
+
+# --- Magnification: distance ↔ HFOV ---
+
+def magnification(focal_length, distance_mm):
+    f = _f(focal_length)
+    return _out(f / (distance_mm - f))
+
+
+def hfov_at_distance(sensor_width, focal_length, distance_mm):
+    """Horizontal field width (mm) covered at a working distance (mm)."""
+    return _out(_f(sensor_width) / magnification(focal_length, distance_mm))
+
+
+def distance_for_hfov(sensor_width, focal_length, hfov_mm):
+    """Working distance (mm) at which the field width equals hfov_mm."""
+    m = _f(sensor_width) / hfov_mm
+    return _out(focal_length / m + focal_length)
+
+
+def cm_per_px(hfov_mm, h_res):
+    return _out(_f(hfov_mm) / h_res / 10)
+
+
+def pixels_on_width(hfov_mm, h_res, width_cm=FACE_WIDTH_CM):
+    """Pixels across an object width_cm wide when the field is hfov_mm."""
+    return _out(width_cm / cm_per_px(hfov_mm, h_res))
+
+
+def pixels_at_distance(sensor_width, h_res, focal_length, distance_mm,
+                       width_cm=FACE_WIDTH_CM):
+    """Pixels across width_cm at distance_mm (the px5 check at TEST_MM)."""
+    hfov_mm = hfov_at_distance(sensor_width, focal_length, distance_mm)
+    return _out(width_cm / ((hfov_mm / 10) / h_res))
+
+
+def face_pixels(h_res, pixel_size, focal_length, distance_cm):
+    """Pixels across an 18 cm face at distance_cm (the page's px_for_18cm),
+    from resolution and pixel size (µm)."""
+    sensor_width = sensor_width_from_pixel(pixel_size, h_res)
+    return pixels_on_width(hfov_at_distance(sensor_width, focal_length, _f(distance_cm) * 10), h_res)
+
+
+def recognition_hfov_mm(h_res, width_cm=FACE_WIDTH_CM, pixels=FACE_PIXELS):
+    """Field width (mm) giving `pixels` across `width_cm` (18 cm / 80 px)."""
+    return _out((width_cm / pixels) * _f(h_res) * 10)
+
+
+def recognition_distance(sensor_width, h_res, focal_length,
+                         width_cm=FACE_WIDTH_CM, pixels=FACE_PIXELS):
+    """Farthest working distance (mm) meeting the width_cm / pixels rule."""
+    hfov_fr_mm = recognition_hfov_mm(h_res, width_cm, pixels)
+    return distance_for_hfov(sensor_width, focal_length, hfov_fr_mm)
+
+
+# --- Depth of field ---
+
+def airy_disk_um(f_number, wavelength_um=WAVELENGTH_UM):
+    return _out(2.44 * wavelength_um * _f(f_number))
+
+
+def coc_mm(f_number, pixel_size, bayer_factor=2):
+    """Circle of confusion (mm): max(Airy disk, pixel pitch) × Bayer factor."""
+    delta = np.maximum(airy_disk_um(f_number), pixel_size)
+    return _out(delta * bayer_factor / 1000)
+
+
+def hyperfocal(focal_length, f_number, coc):
+    f = _f(focal_length)
+    return _out(f + (f * f) / (f_number * coc))
+
+
+def dof_limits(focal_length, f_number, coc, focus_mm):
+    """Near/far focus limits (mm); far is inf beyond the hyperfocal distance."""
+    f = _f(focal_length)
+    u = _f(focus_mm)
+    H = hyperfocal(f, f_number, coc)
+    Dn = (H * u) / (H + (u - f))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        Df = np.where(u < H, (H * u) / (H - (u - f)), np.inf)
+    return _out(Dn), _out(Df)
+
+
+def focus_for_far_limit(focal_length, f_number, coc, far_mm):
+    """Closest focus distance (mm) whose far limit still reaches far_mm.
+
+    Dn grows with the focus distance, so this focus gives the nearest
+    possible near limit while keeping Df >= far_mm.
+    """
+    f = _f(focal_length)
+    H = hyperfocal(f, f_number, coc)
+    return _out(np.minimum(H, far_mm * (H + f) / (H + far_mm)))
+
+
+def covers_range(near_mm, far_mm, min_cm, max_cm):
+    """True where [near, far] contains [min_cm, max_cm]."""
+    return _out((_f(near_mm) / 10 <= min_cm) & (_f(far_mm) / 10 >= max_cm))
+
+
+def evaluate(sensor_width, h_res, focal_length, f_number, pixel_size, focus_mm,
+             min_dof_cm, max_dof_cm, required_px_at_5m=FACE_PIXELS):
+    """Full Summary Check for a batch of configurations.
+
+    Returns a dict of arrays: recognition distance, hyperfocal, near/far
+    limits, px5 and the pass/fail flags shown on the page.
+    """
+    C = coc_mm(f_number, pixel_size)
+    H = hyperfocal(focal_length, f_number, C)
+    Dn, Df = dof_limits(focal_length, f_number, C, focus_mm)
+    px5 = pixels_at_distance(sensor_width, h_res, focal_length, TEST_MM)
+    covers = covers_range(Dn, Df, min_dof_cm, max_dof_cm)
+    px_ok = _out(_f(px5) >= required_px_at_5m)
+    return {
+        "distance_fr_mm": recognition_distance(sensor_width, h_res, focal_length),
+        "coc_mm": C,
+        "hyperfocal_mm": H,
+        "near_mm": Dn,
+        "far_mm": Df,
+        "px5": px5,
+        "covers": covers,
+        "px_ok": px_ok,
+        "ok": _out(covers & px_ok),
+    }
@@ -0,0 +1,187 @@
+"""Per-section timers and allocation counters for camera_web.py reruns.
+
+    CAMERA_WEB_PROFILE=1 streamlit run camera_web.py
+
+The page starts a Profile with begin() and finishes it with end(). Sections
+in between are timed with `with section(name):` or the @timed(name)
+decorator, for wall time, thread CPU time, and net and peak allocation.
+end() writes one JSON line per rerun to the "camera_web.profile" logger.
+A fragment rerun outside a page run gets its own Profile when the
+decorator's enabled() callable says profiling is on for that session.
+
+When no Profile is active, section() returns a shared null context and
+@timed calls straight through, so nothing is measured or allocated.
+tracemalloc runs only while at least one Profile is active, and is stopped
+again only if this module started it. Its counters are process-wide, so
+concurrent sessions show up in each other's allocation numbers.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+from typing import NamedTuple
+
+log = logging.getLogger("camera_web.profile")
+
+ENV_FLAG = "CAMERA_WEB_PROFILE"
+_NULL = contextlib.nullcontext()
+_current = contextvars.ContextVar("profile", default=None)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False  # tracemalloc 是否由本模組啟動
+
+
+def env_enabled():
+    return os.environ.get(ENV_FLAG, "") not in ("", "0", "false", "no")
+
+
+class Record(NamedTuple):
+    name: str
+    depth: int
+    wall_ms: float
+    cpu_ms: float
+    alloc_kb: float   # 淨配置 (結束 - 開始)
+    peak_kb: float    # 區段內配置高點 (相對開始)
+
+
+class _Frame:
+    __slots__ = ("start_mem", "peak_mem")
+
+    def __init__(self, mem):
+        self.start_mem = mem
+        self.peak_mem = mem
+
+
+class Profile:
+    """Section records of one rerun (or one fragment rerun)."""
+
+    def __init__(self, label):
+        self.label = label
+        self.records = []
+        self._stack = []
+        self._start = time.perf_counter()
+        self.wall_ms = None
+
+    @contextlib.contextmanager
+    def section(self, name):
+        # 巢狀區段共用 tracemalloc 的單一高點：進入前把目前高點記到外層
+        mem, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1].peak_mem = max(self._stack[-1].peak_mem, peak)
+        tracemalloc.reset_peak()
+        frame = _Frame(mem)
+        self._stack.append(frame)
+        index = len(self.records)
+        self.records.append(None)  # 依進入順序保留位置
+        t0, c0 = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - t0, time.thread_time() - c0
+            mem, peak = tracemalloc.get_traced_memory()
+            frame.peak_mem = max(frame.peak_mem, peak)
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1].peak_mem = max(self._stack[-1].peak_mem, frame.peak_mem)
+            self.records[index] = Record(name, len(self._stack), wall * 1000, cpu * 1000,
+                                         (mem - frame.start_mem) / 1024, (frame.peak_mem - frame.start_mem) / 1024)
+
+    def as_dict(self):
+        return {
+            "label": self.label,
+            "wall_ms": round(self.wall_ms, 3) if self.wall_ms is not None else None,
+            "sections": [
+                {k: round(v, 3) if isinstance(v, float) else v for k, v in r._asdict().items()}
+                for r in self.records if r is not None
+            ],
+        }
+
+
+def _start_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users += 1
+        if _tracing_users == 1 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+
+
+def _stop_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        _tracing_users = max(0, _tracing_users - 1)
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+def current():
+    return _current.get()
+
+
+def begin(label="rerun"):
+    """Start profiling this thread's rerun; returns the Profile."""
+    if _current.get() is not None:
+        end()
+    _start_tracing()
+    profile = Profile(label)
+    _current.set(profile)
+    return profile
+
+
+def end():
+    """Finish the active Profile, log it as one JSON line and return it (None if inactive)."""
+    profile = _current.get()
+    if profile is None:
+        return None
+    _current.set(None)
+    _stop_tracing()
+    profile.wall_ms = (time.perf_counter() - profile._start) * 1000
+    log.info(json.dumps(profile.as_dict(), ensure_ascii=False))
+    return profile
+
+
+def section(name):
+    profile = _current.get()
+    return _NULL if profile is None else profile.section(name)
+
+
+def timed(name, enabled=env_enabled):
+    """Time every call of the decorated function as section `name`.
+
+    Inside an active Profile the call is a nested section. Otherwise (a
+    fragment rerun) it gets its own Profile if enabled() is true.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            profile = _current.get()
+            if profile is not None:
+                with profile.section(name):
+                    return func(*args, **kwargs)
+            if not enabled():
+                return func(*args, **kwargs)
+            # fragment 單獨重跑：自成一筆 profile
+            profile = begin(name)
+            try:
+                with profile.section(name):
+                    return func(*args, **kwargs)
+            finally:
+                end()
+        return wrapper
+    return decorator
+
+
+def configure_logging():
+    """Send profile lines to stderr if nothing else handles them."""
+    if not log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log.propagate = False
@@ -0,0 +1,83 @@
+"""Matplotlib rendering with bounded memory.
+
+Figures are created with matplotlib.figure.Figure, so they never enter the
+pyplot registry. Each one is cleared as soon as its PNG is written. Rendered
+PNGs go to the shared render cache, so repeated inputs skip the draw.
+stats() reports live figures and bytes held, to check memory stays flat.
+
+Importing this module loads matplotlib, so the page imports it lazily.
+The default text font is left alone: the bar draws no emoji, and the
+page's emoji text is in browser-rendered SVG/HTML.
+"""
+import contextlib
+import io
+import threading
+
+from matplotlib.figure import Figure
+
+import cache
+
+PNG_DPI = 200  # 與 st.pyplot 預設相同
+
+# matplotlib 不保證多執行緒安全，繪圖時序列化
+_draw_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_live_figures = 0
+
+
+@contextlib.contextmanager
+def figure(**kwargs):
+    """A Figure outside pyplot that is released when the block exits."""
+    global _live_figures
+    with _draw_lock:
+        fig = Figure(**kwargs)
+        with _stats_lock:
+            _live_figures += 1
+        try:
+            yield fig
+        finally:
+            fig.clear()
+            with _stats_lock:
+                _live_figures -= 1
+
+
+def to_png(fig, dpi=PNG_DPI):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    return buf.getvalue()
+
+
+@cache.memoize(cache.RENDERS)
+def occupancy_bar_png(px_for_18cm, max_px=80.0):
+    """Face-width occupancy bar: px_for_18cm filled out of max_px."""
+    with figure(figsize=(6, 1.5)) as fig:
+        ax = fig.subplots()
+        fill_px = min(px_for_18cm, max_px)            # 條狀圖最多填到 80px
+        actual_ratio = px_for_18cm / max_px * 100     # 真正的占比，可能超過 100%
+
+        # 畫出綠色填滿部分
+        ax.barh(0, fill_px, color="green")
+        # 畫出剩餘部分（灰色）
+        ax.barh(0, max_px - fill_px, left=fill_px, color="lightgray")
+
+        ax.set_xlim(0, max_px)
+        ax.set_yticks([])
+        ax.set_xticks([])
+
+        # 標題顯示 真實 px 和 真實占比（可能 >100%）
+        ax.set_title(
+            f"Face Width Occupancy: {px_for_18cm:.1f} px / {max_px:.0f} px "
+            f"({actual_ratio:.1f}% )"
+        )
+        return to_png(fig)
+
+
+def stats():
+    """Live figure count and bytes held by cached renders."""
+    held = cache.RENDERS.stats()
+    with _stats_lock:
+        return {
+            "live_figures": _live_figures,
+            "cached_renders": held["entries"],
+            "bytes_held": held["bytes"],
+        }
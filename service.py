@@ -0,0 +1,318 @@
+"""Local JSON HTTP service for the calculator.
+
+    python service.py [--host 127.0.0.1 --port 8765]
+
+    POST /v1/evaluate  one configuration → Summary Check numbers
+    POST /v1/batch     {"items": [...], ...defaults} → {"results": [...]}
+    POST /v1/adjust    one configuration (+ N_adj, f_adj, stops = a tables.py
+                       stop set) → feasible focal range per f-number within
+                       the page's ± windows and the page's two recommendations
+    GET  /health       {"status": "ok", "cache": ...}
+
+A configuration has h_res, focal_length (mm), f_number, sensor_width (mm)
+and/or pixel_size (µm), and optionally focus_cm, near_cm, far_cm and
+required_px (the page's defaults otherwise). Batches are evaluated in one
+vectorized call; an invalid item gets {"error": ...} in its slot of
+"results" instead of failing the batch. Infinite far limits are returned
+as null.
+
+The server is a plain asyncio HTTP/1.1 loop with keep-alive. Responses are
+cached on (path, request body), so repeated inputs skip both the math and
+the JSON encoding.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import numpy as np
+
+import adjust
+import cache
+import optics
+import tables
+
+DEFAULTS = {"focus_cm": optics.FOCUS_CM, "near_cm": optics.NEAR_CM, "far_cm": optics.FAR_CM,
+            "required_px": optics.FACE_PIXELS}
+FIELDS = ("h_res", "focal_length", "f_number", *DEFAULTS)
+COLUMNS = (*FIELDS, "sensor_width", "pixel_size")
+POSITIVE = {"h_res", "focal_length", "f_number", "sensor_width", "pixel_size", "focus_cm"}
+_POSITIVE_COLS = [name in POSITIVE for name in FIELDS] + [True]  # 最後一欄是 sensor_width 或 pixel_size
+MAX_BODY = 16 * 1024 * 1024
+MAX_BATCH = 100_000
+EXECUTOR_ITEMS = 1000  # 超過此筆數的批次改在執行緒池計算，不卡住事件迴圈
+
+RESPONSES = cache.LRUCache("responses", max_entries=8192, max_bytes=32 * 1024 * 1024, ttl=3600)
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(name, value):
+    try:
+        x = float(value)
+    except (TypeError, ValueError):
+        raise RequestError(400, f"non-numeric field: {name}")
+    if not np.isfinite(x):
+        raise RequestError(400, f"non-finite field: {name}")
+    if name in POSITIVE and x <= 0:
+        raise RequestError(400, f"{name} must be positive")
+    return x
+
+
+def _row(item, defaults):
+    """Validated inputs of one item in COLUMNS order (NaN for whichever of
+    sensor_width / pixel_size the page would derive)."""
+    row = []
+    for name in FIELDS:
+        if name not in item and name not in defaults:
+            raise RequestError(400, f"missing field: {name}")
+        row.append(_number(name, item.get(name, defaults.get(name))))
+    sw, ps = item.get("sensor_width"), item.get("pixel_size")
+    if sw is not None:
+        return row + [_number("sensor_width", sw), np.nan]
+    if ps is not None:
+        return row + [np.nan, _number("pixel_size", ps)]
+    raise RequestError(400, "sensor_width or pixel_size is required")
+
+
+def _inputs(items, defaults):
+    """(arrays of every input, per-item error message or None).
+
+    Sensor width / pixel size are filled in like the page. Invalid items get
+    placeholder values so the rest of the batch is still computed in one
+    vectorized call; callers must drop their results.
+    """
+    d = {**DEFAULTS, **{k: _number(k, v) for k, v in defaults.items() if k in DEFAULTS}}
+    try:
+        raw = np.array([[it.get(k, d.get(k)) for k in COLUMNS] for it in items], dtype=float)
+        raw = raw.reshape(len(items), len(COLUMNS))
+    except (TypeError, ValueError):
+        raw = np.full((len(items), len(COLUMNS)), np.nan)  # 有非數值欄位：全部逐項檢查
+    sw, ps = raw[:, -2], raw[:, -1]
+    given = np.column_stack([raw[:, :len(FIELDS)], np.where(np.isnan(sw), ps, sw)])
+    with np.errstate(invalid="ignore"):
+        ok = np.isfinite(given).all(axis=1) & (given[:, _POSITIVE_COLS] > 0).all(axis=1)
+    errors = [None] * len(items)
+    for i in np.flatnonzero(~ok):  # 只有可疑的項目才逐項解析，取得錯誤訊息
+        try:
+            raw[i] = _row(items[i], d)
+        except RequestError as e:
+            raw[i] = 1.0  # 佔位值，結果會被丟棄
+            errors[i] = str(e)
+    cols = dict(zip(FIELDS, raw.T))
+    h_res, sw, ps = cols["h_res"], raw[:, -2], raw[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols["sensor_width"] = np.where(np.isnan(sw), optics.sensor_width_from_pixel(ps, h_res), sw)
+        cols["pixel_size"] = np.where(np.isnan(sw), ps, optics.pixel_size_from_width(sw, h_res))
+    return cols, errors
+
+
+def evaluate_items(items, defaults=None):
+    """Summary Check for a list of configuration dicts.
+
+    Returns one result dict per item; an invalid item gets {"error": message}
+    instead, and the other items are still evaluated.
+    """
+    c, errors = _inputs(items, defaults or {})
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = optics.evaluate(c["sensor_width"], c["h_res"], c["focal_length"], c["f_number"],
+                            c["pixel_size"], c["focus_cm"] * 10, c["near_cm"], c["far_cm"], c["required_px"])
+    far = r["far_mm"] / 10
+    cols = {
+        "sensor_width": c["sensor_width"].tolist(),
+        "pixel_size": c["pixel_size"].tolist(),
+        "distance_fr_cm": (r["distance_fr_mm"] / 10).tolist(),
+        "hyperfocal_cm": (r["hyperfocal_mm"] / 10).tolist(),
+        "coc_mm": r["coc_mm"].tolist(),
+        "near_cm": (r["near_mm"] / 10).tolist(),
+        "far_cm": np.where(np.isinf(far), None, far).tolist(),
+        "px5": r["px5"].tolist(),
+        "covers": r["covers"].tolist(),
+        "px_ok": r["px_ok"].tolist(),
+        "ok": r["ok"].tolist(),
+    }
+    return [dict(zip(cols, row)) if error is None else {"error": error}
+            for row, error in zip(zip(*cols.values()), errors)]
+
+
+def adjust_item(item):
+    """Feasible focal-length interval per f-number (the page's Exact solver)."""
+    cols, errors = _inputs([item], {})
+    if errors[0]:
+        raise RequestError(400, errors[0])
+    c = {k: float(v[0]) for k, v in cols.items()}
+    N_adj = _number("N_adj", item.get("N_adj", 2.0))
+    f_adj = _number("f_adj", item.get("f_adj", 5.0))
+    if N_adj < 0 or f_adj < 0:
+        raise RequestError(400, "N_adj and f_adj must not be negative")
+    stops = item.get("stops", "standard")
+    if not isinstance(stops, str) or stops not in tables.DEFAULT.stops:
+        raise RequestError(400, f"unknown stops; one of {', '.join(tables.DEFAULT.stops)}")
+    apertures = tables.DEFAULT.stops[stops]
+    N, f = c["f_number"], c["focal_length"]
+    N_vals = apertures[(apertures >= N - N_adj) & (apertures <= N + N_adj)]
+    sol = adjust.solve_focal_intervals(N_vals, c["pixel_size"], c["sensor_width"], c["h_res"],
+                                       c["focus_cm"] * 10, c["near_cm"], c["far_cm"], c["required_px"])
+    # 與頁面 Exact solver 相同的焦距 ± 範圍
+    sol = adjust.clip_intervals(sol, max(1.0, f - f_adj), f + f_adj)
+    out = {
+        "intervals": [
+            {"f_number": float(n), "f_min": float(lo), "f_max": float(hi), "limited_by": str(b)}
+            for n, lo, hi, b, ok in zip(sol.N_vals, sol.f_lo, sol.f_hi, sol.bound_hi, sol.feasible) if ok
+        ],
+        "min_delta_f_number": None,
+        "min_delta_focal_length": None,
+    }
+    ok_idx = np.flatnonzero(sol.feasible)
+    if len(ok_idx):
+        # 與頁面 Exact solver 相同的兩個推薦
+        f_near = np.clip(f, sol.f_lo[ok_idx], sol.f_hi[ok_idx])
+        iN = ok_idx[np.argmin(np.abs(sol.N_vals[ok_idx] - N))]
+        iF = np.lexsort((np.abs(sol.N_vals[ok_idx] - N), np.abs(f_near - f)))[0]
+        out["min_delta_f_number"] = {"f_number": float(sol.N_vals[iN]),
+                                     "focal_length": float(np.clip(f, sol.f_lo[iN], sol.f_hi[iN]))}
+        out["min_delta_focal_length"] = {"f_number": float(sol.N_vals[ok_idx[iF]]),
+                                         "focal_length": float(f_near[iF])}
+    return out
+
+
+def _object(body):
+    try:
+        data = json.loads(body or b"{}")
+    except ValueError:
+        raise RequestError(400, "invalid JSON")
+    if not isinstance(data, dict):
+        raise RequestError(400, "JSON object expected")
+    return data
+
+
+async def _dispatch(method, path, body):
+    if path == "/health":
+        return {"status": "ok", "cache": {**cache.stats(), "responses": RESPONSES.stats()}}
+    if path not in ("/v1/evaluate", "/v1/batch", "/v1/adjust"):
+        raise RequestError(404, f"no route {path}")
+    if method != "POST":
+        raise RequestError(405, "use POST")
+    data = _object(body)
+    if path == "/v1/evaluate":
+        result = evaluate_items([data])[0]
+        if "error" in result:
+            raise RequestError(400, result["error"])
+        return result
+    if path == "/v1/adjust":
+        return adjust_item(data)
+    items = data.pop("items", None)
+    if not isinstance(items, list) or not all(isinstance(it, dict) for it in items):
+        raise RequestError(400, "items must be a list of objects")
+    if len(items) > MAX_BATCH:
+        raise RequestError(413, f"at most {MAX_BATCH:,} items per batch")
+    if len(items) > EXECUTOR_ITEMS:
+        results = await asyncio.get_running_loop().run_in_executor(None, evaluate_items, items, data)
+    else:
+        results = evaluate_items(items, data)
+    return {"results": results}
+
+
+def _response(status, payload, keep_alive):
+    body = payload if isinstance(payload, bytes) else json.dumps(payload, allow_nan=False).encode()
+    head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + body
+
+
+async def _respond(method, path, body):
+    """(status, JSON bytes); successful POST responses are cached on the raw body."""
+    key = (method, path, body)
+    cached = RESPONSES.get(key) if method == "POST" else None
+    if cached is not None:
+        return 200, cached
+    try:
+        payload = json.dumps(await _dispatch(method, path, body), allow_nan=False).encode()
+    except RequestError as e:
+        return e.status, json.dumps({"error": str(e)}).encode()
+    except ValueError as e:  # 非有限數值等
+        return 400, json.dumps({"error": str(e)}).encode()
+    except Exception as e:
+        return 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+    if method == "POST":
+        RESPONSES.put(key, payload)
+    return 200, payload
+
+
+async def handle(reader, writer):
+    """Serve HTTP/1.1 requests on one connection until it closes."""
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                method, target, version = line.decode("latin-1").split()
+            except ValueError:
+                writer.write(_response(400, {"error": "bad request line"}, False))
+                break
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = h.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            conn = headers.get("connection", "").lower()
+            keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+            raw_length = headers.get("content-length", "0") or "0"
+            if not raw_length.isdigit():
+                # 無法判斷 body 邊界，回 400 後關閉連線
+                writer.write(_response(400, {"error": "invalid Content-Length"}, False))
+                break
+            length = int(raw_length)
+            if length > MAX_BODY:
+                writer.write(_response(413, {"error": "body too large"}, False))
+                break
+            body = await reader.readexactly(length) if length else b""
+
+            status, payload = await _respond(method, target.split("?", 1)[0], body)
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start(host="127.0.0.1", port=8765):
+    """Listening server; port 0 picks a free port (see server.sockets)."""
+    return await asyncio.start_server(handle, host, port, backlog=1024)
+
+
+async def serve(host="127.0.0.1", port=8765):
+    server = await start(host, port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"listening on http://{host}:{port}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    a = p.parse_args(argv)
+    try:
+        asyncio.run(serve(a.host, a.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Cold-start measurement for camera_web.py.
+
+    python startup_timing.py
+
+Each measurement runs in a fresh interpreter so nothing is already imported:
+  - import latency of the app's modules and the heavy libraries behind them
+  - first-render latency of the page and of each lazily loaded renderer
+"""
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+IMPORTS = ["numpy", "streamlit", "optics", "adjust", "dof_chart", "PIL.Image", "render"]
+
+FIRST_RENDERS = {
+    "page (empty inputs)": (
+        "from streamlit.testing.v1 import AppTest\n"
+        "at = AppTest.from_file('camera_web.py', default_timeout=120)\n"
+        "t = time.perf_counter(); at.run(); dt = time.perf_counter() - t\n"
+        "assert not at.exception, at.exception\n"
+    ),
+    "occupancy bar": (
+        "t = time.perf_counter()\n"
+        "import render; render.occupancy_bar_png(99.5)\n"
+        "dt = time.perf_counter() - t\n"
+    ),
+    "DoF chart": (
+        "t = time.perf_counter()\n"
+        "import dof_chart; dof_chart.dof_svg(194.6, 300.0, 654.3)\n"
+        "dt = time.perf_counter() - t\n"
+    ),
+    "adjustment grid": (
+        "t = time.perf_counter()\n"
+        "import adjust; adjust.search_grid(2.0, 8.0, 2.9, 5.568, 1920, 3000, 150, 600, 80, 2, 5)\n"
+        "dt = time.perf_counter() - t\n"
+    ),
+}
+
+
+def _run(code):
+    out = subprocess.run(
+        [sys.executable, "-c", "import time\n" + code + "print(dt)"],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def measure_import(module):
+    return _run(f"t = time.perf_counter(); import {module}; dt = time.perf_counter() - t\n")
+
+
+def main():
+    print("Import latency (fresh interpreter)")
+    for module in IMPORTS:
+        print(f"  {module:<22} {measure_import(module) * 1000:8.1f} ms")
+    print("First-render latency (fresh interpreter)")
+    for name, code in FIRST_RENDERS.items():
+        print(f"  {name:<22} {_run(code) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Distance (× f-number) sweeps of face pixels, HFOV and DoF limits.
+
+One broadcast evaluation over all distances and f-numbers. The result is
+memoized, so reruns that only change display options reuse it.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+import cache
+import optics
+
+
+class Sweep(NamedTuple):
+    distances_cm: np.ndarray  # (D,)
+    f_numbers: np.ndarray     # (K,)
+    face_px: np.ndarray       # (D,) pixels across an 18 cm face
+    hfov_cm: np.ndarray       # (D,)
+    near_cm: np.ndarray       # (K, D) near limit when focused at each distance
+    far_cm: np.ndarray        # (K, D) far limit when focused at each distance (inf past H)
+    in_focus: np.ndarray      # (K, D) distance inside the DoF of the fixed focus
+    passes: np.ndarray        # (K, D) face_px >= required and in focus
+
+
+@cache.memoize(cache.METRICS)
+def compute(sensor_width, h_res, focal_length, pixel_size, focus_cm, f_numbers,
+            d_min_cm, d_max_cm, points=2000, required_px=optics.FACE_PIXELS):
+    d = np.linspace(d_min_cm, d_max_cm, int(points))
+    d = d[d * 10 > focal_length]
+    d_mm = d * 10
+    N = np.asarray(f_numbers, dtype=float)[:, None]
+
+    hfov_mm = optics.hfov_at_distance(sensor_width, focal_length, d_mm)
+    px = optics.pixels_on_width(hfov_mm, h_res)
+    C = optics.coc_mm(N, pixel_size)
+    near, far = optics.dof_limits(focal_length, N, C, d_mm[None, :])
+    Dn, Df = optics.dof_limits(focal_length, N, C, focus_cm * 10)
+    in_focus = (d_mm[None, :] >= Dn) & (d_mm[None, :] <= Df)
+    return Sweep(d, N[:, 0], px, hfov_mm / 10, near / 10, far / 10,
+                 in_focus, in_focus & (px >= required_px)[None, :])
+
+
+def bands(mask, x):
+    """(start, end) x-intervals where mask is True."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    return [(float(x[a]), float(x[b])) for a, b in zip(starts, ends)]
@@ -0,0 +1,134 @@
+"""Lookup tables: lens stops, optical formats, common focal lengths.
+
+The built-in tables can be extended with a JSON file named by the
+CAMERA_TABLES environment variable:
+
+    {"stops": {"cine": [1.3, 1.5, 2.1]},
+     "formats": [["1/1.2″", 0.833]],
+     "focal_lengths": [2.1, 3.2]}
+
+Stop sets with a new name are added, and an existing name is replaced.
+Formats and focal lengths are merged in. Everything is sorted once at
+load time, so lookups are searchsorted calls.
+
+sensor_table() precomputes, per pixel pitch, the CoC and N·C of every stop
+and the hyperfocal distance of every (stop, focal length) pair in the
+table. Stops in the table are then index lookups. Other f-numbers fall back
+to the optics formulas and give identical values.
+"""
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+import cache
+import optics
+
+ENV_PATH = "CAMERA_TABLES"
+
+STOPS = {
+    # 原本頁面上的光圈選項
+    "standard": [1.4, 1.6, 1.8, 2, 2.2, 2.5, 2.8, 3.2, 3.5, 4, 4.5, 5],
+    "full": [1.0, 1.4, 2, 2.8, 4, 5.6, 8, 11, 16, 22],
+    "half": [1.0, 1.2, 1.4, 1.7, 2, 2.4, 2.8, 3.3, 4, 4.8, 5.6, 6.7, 8, 9.5, 11, 13, 16, 19, 22],
+    # 1/3 級光圈 (標示值)
+    "third": [1.0, 1.1, 1.2, 1.4, 1.6, 1.8, 2, 2.2, 2.5, 2.8, 3.2, 3.5,
+              4, 4.5, 5, 5.6, 6.3, 7.1, 8, 9, 10, 11, 13, 14, 16, 18, 20, 22],
+}
+FOCAL_LENGTHS = [2.1, 2.8, 3.6, 4, 6, 8, 12, 16, 25, 35, 50]
+
+
+def _out(x):
+    # 與 optics 相同：0-d 陣列轉成 numpy scalar
+    return x[()] if isinstance(x, np.ndarray) and x.ndim == 0 else x
+
+
+def _f(x):
+    return np.asarray(x, dtype=float)
+
+
+class Tables(NamedTuple):
+    stops: dict                 # name -> ascending f-number array
+    format_names: np.ndarray    # ascending by inch
+    format_inches: np.ndarray
+    focal_lengths: np.ndarray   # ascending (mm)
+
+    @property
+    def all_stops(self):
+        """Union of every stop set (ascending)."""
+        return np.unique(np.concatenate(list(self.stops.values())))
+
+    def optical_format(self, opt_inch):
+        """Nearest optical format name, like optics.optical_format."""
+        mid = (self.format_inches[1:] + self.format_inches[:-1]) / 2
+        return _out(self.format_names[np.searchsorted(mid, _f(opt_inch))])
+
+
+def build(stops=None, formats=None, focal_lengths=None):
+    """Tables from the built-ins plus the given extensions."""
+    merged = {name: np.unique(np.asarray(v, dtype=float)) for name, v in {**STOPS, **(stops or {})}.items()}
+    fmts = sorted({name: float(inch) for name, inch in [*optics.FORMATS, *(formats or [])]}.items(),
+                  key=lambda kv: kv[1])
+    return Tables(
+        merged,
+        np.array([name for name, _ in fmts]),
+        np.array([inch for _, inch in fmts]),
+        np.unique(np.asarray([*FOCAL_LENGTHS, *(focal_lengths or [])], dtype=float)),
+    )
+
+
+def load(path=None):
+    """Tables extended by the JSON file at path (or $CAMERA_TABLES)."""
+    path = path or os.environ.get(ENV_PATH)
+    if not path:
+        return build()
+    with open(path, encoding="utf-8") as fh:
+        ext = json.load(fh)
+    return build(ext.get("stops"), ext.get("formats"), ext.get("focal_lengths"))
+
+
+DEFAULT = load()
+
+
+class SensorTable(NamedTuple):
+    pixel_size: float
+    stops: np.ndarray          # (n,) ascending f-numbers
+    coc_mm: np.ndarray         # (n,) max(Airy, pixel) × Bayer factor
+    K: np.ndarray              # (n,) N·C, so H = f + f²/K
+    focal_lengths: np.ndarray  # (m,)
+    hyperfocal_mm: np.ndarray  # (n, m)
+
+    def _index(self, N):
+        N = _f(N)
+        i = np.minimum(np.searchsorted(self.stops, N), len(self.stops) - 1)
+        return i, self.stops[i] == N
+
+    def coc(self, N):
+        """CoC (mm) at f-number N: table lookup, formula off-table."""
+        i, hit = self._index(N)
+        if np.all(hit):
+            return _out(self.coc_mm[i])
+        return _out(np.where(hit, self.coc_mm[i], optics.coc_mm(N, self.pixel_size)))
+
+    def hyperfocal(self, N, f):
+        """Hyperfocal distance (mm); in-table (N, f) pairs are lookups."""
+        i, hit = self._index(N)
+        f = _f(f)
+        j = np.minimum(np.searchsorted(self.focal_lengths, f), len(self.focal_lengths) - 1)
+        K = self.K[i] if np.all(hit) else np.where(hit, self.K[i], _f(N) * optics.coc_mm(N, self.pixel_size))
+        exact = hit & (self.focal_lengths[j] == f)
+        return _out(np.where(exact, self.hyperfocal_mm[i, j], f + f * f / K))
+
+
+def build_sensor_table(pixel_size, tables):
+    N = tables.all_stops
+    C = optics.coc_mm(N, pixel_size)
+    H = optics.hyperfocal(tables.focal_lengths[None, :], N[:, None], C[:, None])
+    return SensorTable(float(pixel_size), N, C, N * C, tables.focal_lengths, H)
+
+
+@cache.memoize(cache.METRICS)
+def sensor_table(pixel_size):
+    """Per-stop CoC / hyperfocal table of DEFAULT for one pixel pitch."""
+    return build_sensor_table(pixel_size, DEFAULT)
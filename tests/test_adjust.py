@@ -0,0 +1,139 @@
+"""Regression tests for adjust.py against brute-force focal-length grids
+and the page's original nested-loop search."""
+import math
+
+import numpy as np
+import pytest
+
+import adjust
+import optics
+
+STEP = 0.002
+F_VALS = np.round(np.arange(1.0, 100.0, STEP), 6)
+
+CASES = [
+    # pixel_size (µm), h_res, focus (mm), near (cm), far (cm), required px at 5 m
+    (2.9, 1920, 3000.0, 150.0, 600.0, 80.0),
+    (2.0, 2560, 1000.0, 50.0, 1500.0, 80.0),
+    (1.4, 3840, 5000.0, 300.0, 1200.0, 120.0),
+    (3.0, 1280, 2000.0, 100.0, 400.0, 40.0),
+    (2.9, 1920, 3000.0, 290.0, 1000.0, 40.0),  # 遠端限制決定上界
+]
+
+
+def feasible_focal_lengths(N, pixel_size, sensor_width, h_res, focus_mm, near_cm, far_cm, required_px):
+    C = optics.coc_mm(N, pixel_size)
+    Dn, Df = optics.dof_limits(F_VALS, N, C, focus_mm)
+    px5 = optics.pixels_at_distance(sensor_width, h_res, F_VALS, optics.TEST_MM)
+    return F_VALS[optics.covers_range(Dn, Df, near_cm, far_cm) & (px5 >= required_px)]
+
+
+def assert_matches(sol, i, fls):
+    if not sol.feasible[i]:
+        assert len(fls) == 0
+        return
+    assert len(fls)
+    assert fls[0] == pytest.approx(sol.f_lo[i], abs=STEP)
+    assert fls[-1] == pytest.approx(sol.f_hi[i], abs=STEP)
+    # 可行焦距必須是單一連續區間
+    assert len(fls) == round((fls[-1] - fls[0]) / STEP) + 1
+
+
+@pytest.mark.parametrize("pixel_size, h_res, focus_mm, near_cm, far_cm, required_px", CASES)
+def test_solver_matches_brute_force(pixel_size, h_res, focus_mm, near_cm, far_cm, required_px):
+    sw = optics.sensor_width_from_pixel(pixel_size, h_res)
+    sol = adjust.solve_focal_intervals.__wrapped__(
+        adjust.THIRD_STOPS, pixel_size, sw, h_res, focus_mm, near_cm, far_cm, required_px)
+    assert (sol.f_hi[sol.feasible] < F_VALS[-1]).all()  # 暴力網格須涵蓋上界
+    for i, N in enumerate(sol.N_vals):
+        fls = feasible_focal_lengths(N, pixel_size, sw, h_res, focus_mm, near_cm, far_cm, required_px)
+        assert_matches(sol, i, fls)
+
+
+@pytest.mark.parametrize("pixel_size, h_res, focus_mm, near_cm, far_cm, required_px", CASES)
+def test_clipped_solver_matches_brute_force(pixel_size, h_res, focus_mm, near_cm, far_cm, required_px):
+    sw = optics.sensor_width_from_pixel(pixel_size, h_res)
+    sol = adjust.solve_focal_intervals.__wrapped__(
+        adjust.THIRD_STOPS, pixel_size, sw, h_res, focus_mm, near_cm, far_cm, required_px)
+    f_min, f_max = 6.0, 10.0
+    clipped = adjust.clip_intervals(sol, f_min, f_max)
+    for i, N in enumerate(sol.N_vals):
+        fls = feasible_focal_lengths(N, pixel_size, sw, h_res, focus_mm, near_cm, far_cm, required_px)
+        assert_matches(clipped, i, fls[(fls >= f_min) & (fls <= f_max)])
+
+
+def loop_candidates(f_number, focal_length, pixel_size, sensor_width, h_res, focus_cm,
+                    min_dof_cm, max_dof_cm, required_px, N_adj, f_adj):
+    """(ΔN, Δf, N, f) of every feasible cell, from the page's original scalar loop."""
+    aperture_choices = np.array([1.4, 1.6, 1.8, 2, 2.2, 2.5, 2.8, 3.2, 3.5, 4, 4.5, 5])
+    N_vals = aperture_choices[(aperture_choices >= f_number - N_adj) & (aperture_choices <= f_number + N_adj)]
+    f_min = max(1.0, math.floor(focal_length - f_adj))
+    f_max = math.ceil(focal_length + f_adj)
+    f_vals = np.arange(f_min, f_max + 1, 1)
+    cand = []
+    for N_try in N_vals:
+        C_mm = 2 * max(2.44 * 0.55 * N_try, pixel_size) / 1000
+        for f_try in f_vals:
+            H = f_try + (f_try**2) / (N_try * C_mm)
+            u = focus_cm * 10
+            Dn = (H * u) / (H + (u - f_try))
+            Df = (H * u) / (H - (u - f_try)) if u < H else float("inf")
+            if not (Dn / 10 <= min_dof_cm and Df / 10 >= max_dof_cm):
+                continue
+            m5 = f_try / (5000.0 - f_try)
+            if 18.0 / ((sensor_width / m5 / 10) / h_res) < required_px:
+                continue
+            dN = abs(N_try - f_number) / (np.ptp(N_vals) + 1e-6)
+            dF = abs(f_try - focal_length) / (np.ptp(f_vals) + 1e-6)
+            cand.append((dN, dF, N_try, f_try))
+    return cand
+
+
+def assert_front_non_dominated(grid):
+    ii, jj = np.nonzero(grid.ok)
+    a, b = grid.dN[ii], grid.dF[jj]
+    front = grid.pareto
+    assert (len(front) > 0) == (len(ii) > 0)
+    for i, j in front:
+        x, y = grid.dN[i], grid.dF[j]
+        assert grid.ok[i, j]
+        assert not np.any((a <= x) & (b <= y) & ((a < x) | (b < y))), (grid.N_vals[i], grid.f_vals[j])
+    if len(front):
+        assert grid.dN[front[0][0]] == a.min() and grid.dF[front[-1][1]] == b.min()
+
+
+def test_pareto_front_is_non_dominated():
+    # f/2.5 的可行焦距是 6.5–7.0 mm：前緣端點必須取 7.0，不能取 6.5
+    grid = adjust.search_grid.__wrapped__(2.0, 8.0, 2.9, 5.568, 1920, 3000, 150, 600, 80, 2, 5, f_step=0.1)
+    assert_front_non_dominated(grid)
+    i, j = grid.pareto[0]
+    assert (grid.N_vals[i], grid.f_vals[j]) == (2.5, 7.0)
+
+
+def test_pareto_front_matches_loop():
+    rng = np.random.default_rng(0)
+    checked = 0
+    for _ in range(300):
+        f_number = float(rng.choice(adjust.APERTURE_CHOICES))
+        focal_length = float(rng.integers(2, 20)) + float(rng.choice([0.0, 0.3, 0.5]))
+        pixel_size = float(rng.uniform(1.2, 4.0))
+        h_res = int(rng.choice([1280, 1920, 2560]))
+        sw = pixel_size * h_res / 1000
+        focus_cm = float(rng.integers(100, 600))
+        near_cm, far_cm = float(rng.integers(30, 300)), float(rng.integers(300, 3000))
+        required_px = float(rng.choice([40.0, 60.0, 80.0]))
+        N_adj, f_adj = float(rng.choice([1.0, 2.0, 3.0])), float(rng.choice([3.0, 5.0, 8.0]))
+
+        cand = loop_candidates(f_number, focal_length, pixel_size, sw, h_res, focus_cm,
+                               near_cm, far_cm, required_px, N_adj, f_adj)
+        grid = adjust.search_grid.__wrapped__(f_number, focal_length, pixel_size, sw, h_res, focus_cm * 10,
+                                              near_cm, far_cm, required_px, N_adj, f_adj)
+        ii, jj = np.nonzero(grid.ok)
+        assert sorted(zip(grid.N_vals[ii], grid.f_vals[jj])) == sorted((N, f) for _, _, N, f in cand)
+        assert_front_non_dominated(grid)
+        if cand:
+            # 端點的 ΔN / Δf 與原本迴圈的 bestN / bestF 相同 (平手時改取另一座標較小者)
+            assert grid.dN[grid.pareto[0][0]] == pytest.approx(min(c[0] for c in cand))
+            assert grid.dF[grid.pareto[-1][1]] == pytest.approx(min(c[1] for c in cand))
+            checked += 1
+    assert checked > 100
@@ -0,0 +1,55 @@
+"""batch.py end to end on small files, chunked so dtypes differ between chunks."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+import optics
+
+
+def skus(n=30):
+    # 前 10 列有 name；第 25 列缺 h_res；focus_cm 只在後 10 列有值
+    return pd.DataFrame({
+        "name": [f"sku{i}" if i < 10 else None for i in range(n)],
+        "h_res": [None if i == 25 else 1920 for i in range(n)],
+        "focal_length": 8,
+        "f_number": 2,
+        "pixel_size": [2.9 if i % 2 else None for i in range(n)],
+        "sensor_width": [None if i % 2 else 5.568 for i in range(n)],
+        "focus_cm": [300 if i >= 20 else None for i in range(n)],
+    })
+
+
+def run(tmp_path, out_name, workers=1):
+    src = tmp_path / "skus.csv"
+    skus().to_csv(src, index=False)
+    out = tmp_path / out_name
+    rows, _ = batch.run(str(src), str(out), workers=workers, chunk_rows=10, log=io.StringIO())
+    assert rows == 30
+    return out
+
+
+def check(df):
+    assert len(df) == 30
+    near = optics.evaluate(5.568, 1920, 8, 2, 2.9, np.array([optics.FOCUS_CM, 300.0]) * 10,
+                           optics.NEAR_CM, optics.FAR_CM, optics.FACE_PIXELS)["near_mm"] / 10
+    # 空白的 focus_cm 用預設值
+    assert df["near_cm"][0] == pytest.approx(near[0])
+    assert df["near_cm"][24] == pytest.approx(near[1])
+    assert np.isnan(df["px5"][25]) and not df["ok"][25]
+
+
+def test_csv(tmp_path):
+    check(pd.read_csv(run(tmp_path, "out.csv")))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parquet_schema_is_fixed_across_chunks(tmp_path, workers):
+    pytest.importorskip("pyarrow")
+    out = run(tmp_path, "out.parquet", workers)
+    df = pd.read_parquet(out)
+    check(df)
+    assert df["h_res"].dtype == np.float64 and df["ok"].dtype == bool
+    assert df["name"][0] == "sku0" and pd.isna(df["name"][10])
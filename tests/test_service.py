@@ -0,0 +1,141 @@
+"""service.py over real HTTP on an ephemeral localhost port."""
+import asyncio
+import http.client
+import json
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+import adjust
+import optics
+import service
+
+GOOD = {"h_res": 1920, "focal_length": 8, "f_number": 2, "pixel_size": 2.9}
+
+
+@pytest.fixture(scope="module")
+def port():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(service.start("127.0.0.1", 0), loop).result(10)
+    yield server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+
+
+def request(port, method, path, payload=None, conn=None):
+    conn = conn or http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    body = None if payload is None else json.dumps(payload).encode()
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    return resp.status, json.loads(resp.read()), resp
+
+
+def raw(port, data):
+    with socket.create_connection(("127.0.0.1", port), timeout=10) as sock:
+        sock.sendall(data)
+        chunks = []
+        while chunk := sock.recv(65536):
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def test_evaluate_matches_optics(port):
+    status, r, _ = request(port, "POST", "/v1/evaluate", GOOD)
+    assert status == 200
+    sw = optics.sensor_width_from_pixel(2.9, 1920)
+    expected = optics.evaluate(sw, 1920, 8, 2, 2.9, optics.FOCUS_CM * 10, optics.NEAR_CM, optics.FAR_CM,
+                               optics.FACE_PIXELS)
+    assert r["px5"] == pytest.approx(float(expected["px5"]))
+    assert r["near_cm"] == pytest.approx(float(expected["near_mm"]) / 10)
+    assert r["ok"] == bool(expected["ok"])
+
+
+def test_batch_matches_single_requests(port):
+    items = [GOOD, {**GOOD, "focal_length": 12, "focus_cm": 300}, {**GOOD, "sensor_width": 5.568}]
+    status, r, _ = request(port, "POST", "/v1/batch", {"items": items, "far_cm": 900})
+    assert status == 200
+    for item, result in zip(items, r["results"]):
+        assert request(port, "POST", "/v1/evaluate", {"far_cm": 900, **item})[1] == result
+
+
+def test_batch_item_errors_agree_between_paths(port):
+    bad = [
+        {**GOOD, "h_res": 0},
+        {"h_res": 1920, "f_number": 2, "pixel_size": 2.9},
+        {**GOOD, "pixel_size": -1},
+        {"h_res": 1920, "focal_length": 8, "f_number": 2},
+        {**GOOD, "focus_cm": None},
+    ]
+    items = [GOOD, *bad]
+    # 全數值 → 向量化檢查後逐項取訊息；加一個字串欄位 → 全部逐項檢查
+    _, fast, _ = request(port, "POST", "/v1/batch", {"items": items})
+    _, slow, _ = request(port, "POST", "/v1/batch", {"items": [*items, {**GOOD, "f_number": "x"}]})
+    assert fast["results"] == slow["results"][:-1]
+    assert slow["results"][-1] == {"error": "non-numeric field: f_number"}
+    assert "error" not in fast["results"][0]
+    assert [r["error"] for r in fast["results"][1:]] == [
+        "h_res must be positive",
+        "missing field: focal_length",
+        "pixel_size must be positive",
+        "sensor_width or pixel_size is required",
+        "non-numeric field: focus_cm",
+    ]
+
+
+def test_evaluate_invalid_item_is_400(port):
+    status, r, _ = request(port, "POST", "/v1/evaluate", {**GOOD, "h_res": 0})
+    assert status == 400 and r == {"error": "h_res must be positive"}
+
+
+def test_adjust_applies_focal_window(port):
+    status, r, _ = request(port, "POST", "/v1/adjust", {**GOOD, "focus_cm": 300, "near_cm": 150,
+                                                        "far_cm": 600, "f_adj": 0.5})
+    assert status == 200
+    sw = optics.sensor_width_from_pixel(2.9, 1920)
+    N_vals = adjust.APERTURE_CHOICES[np.abs(adjust.APERTURE_CHOICES - 2) <= 2]
+    sol = adjust.clip_intervals(adjust.solve_focal_intervals(N_vals, 2.9, sw, 1920, 3000, 150, 600, 80),
+                                7.5, 8.5)
+    assert [(i["f_number"], i["f_min"], i["f_max"]) for i in r["intervals"]] == [
+        (float(n), float(lo), float(hi)) for n, lo, hi, ok in zip(sol.N_vals, sol.f_lo, sol.f_hi, sol.feasible) if ok
+    ]
+    assert all(7.5 <= i["f_min"] <= i["f_max"] <= 8.5 for i in r["intervals"])
+    assert r["min_delta_focal_length"]["focal_length"] == 8.0
+
+
+@pytest.mark.parametrize("stops", [[1], {"a": 1}, "nope"])
+def test_adjust_bad_stops_is_400(port, stops):
+    status, r, _ = request(port, "POST", "/v1/adjust", {**GOOD, "stops": stops})
+    assert status == 400 and r["error"].startswith("unknown stops")
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-1", b"1.5"])
+def test_bad_content_length_is_400(port, length):
+    head = raw(port, b"POST /v1/evaluate HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n{}")
+    assert head.startswith(b"HTTP/1.1 400 ") and b"Connection: close" in head
+
+
+def test_unknown_route_and_method(port):
+    assert request(port, "POST", "/v1/nope", {})[0] == 404
+    assert request(port, "GET", "/v1/evaluate")[0] == 405
+    status, r, _ = request(port, "GET", "/health")
+    assert status == 200 and r["status"] == "ok"
+
+
+def test_keep_alive(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    request(port, "GET", "/health", conn=conn)
+    sock = conn.sock
+    for n in range(3):
+        status, _, resp = request(port, "POST", "/v1/evaluate", {**GOOD, "focal_length": 8 + n}, conn=conn)
+        assert status == 200 and resp.getheader("Connection") == "keep-alive"
+    assert conn.sock is sock  # 同一條連線
+    conn.request("GET", "/health", headers={"Connection": "close"})
+    resp = conn.getresponse()
+    resp.read()
+    assert resp.getheader("Connection") == "close"
+    conn.close()
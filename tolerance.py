@@ -0,0 +1,80 @@
+"""Monte Carlo tolerance / yield of the Summary Check.
+
+Focal length, pixel pitch and f-number are drawn uniformly within ± a
+relative tolerance. Focus distance is drawn within ± an absolute mounting
+tolerance. Every sample goes through optics.evaluate, the same DoF and px5
+checks the page shows. Samples are drawn and evaluated in fixed-size
+chunks, so memory does not grow with the sample count. A given seed and
+chunk size always give the same result.
+"""
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+import cache
+import optics
+
+CHUNK = 1 << 18
+Z_95 = 1.959963984540054
+
+
+class Tolerances(NamedTuple):
+    focal_rel: float = 0.05    # ±5 % 焦距
+    pixel_rel: float = 0.0     # ± 像素間距
+    f_number_rel: float = 0.0  # ± 光圈
+    focus_cm: float = 10.0     # ± 安裝/對焦距離
+
+
+class Yield(NamedTuple):
+    samples: int
+    passed: int
+    covers: int       # 通過 DoF 範圍
+    px_ok: int        # 通過 5 m 像素
+    seed: int
+
+    @property
+    def fraction(self):
+        return self.passed / self.samples if self.samples else float("nan")
+
+    def interval(self, z=Z_95):
+        """Wilson score interval for the pass fraction."""
+        return wilson(self.passed, self.samples, z)
+
+
+def wilson(k, n, z=Z_95):
+    if not n:
+        return float("nan"), float("nan")
+    p = k / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def _draw(rng, nominal, rel, n):
+    if not rel:
+        return np.full(n, float(nominal))
+    return nominal * (1 + rng.uniform(-rel, rel, n))
+
+
+@cache.memoize(cache.METRICS)
+def simulate(focal_length, pixel_size, h_res, f_number, focus_cm,
+             min_dof_cm, max_dof_cm, required_px_at_5m=optics.FACE_PIXELS,
+             tolerances=Tolerances(), samples=1_000_000, seed=0, chunk=CHUNK):
+    """Yield of the Summary Check over `samples` perturbed configurations."""
+    tol = Tolerances(*tolerances)
+    rng = np.random.default_rng(seed)
+    passed = covers = px_ok = 0
+    for start in range(0, samples, chunk):
+        n = min(chunk, samples - start)
+        f = _draw(rng, focal_length, tol.focal_rel, n)
+        pixel = _draw(rng, pixel_size, tol.pixel_rel, n)
+        N = _draw(rng, f_number, tol.f_number_rel, n)
+        u_cm = focus_cm + rng.uniform(-tol.focus_cm, tol.focus_cm, n) if tol.focus_cm else np.full(n, focus_cm)
+        r = optics.evaluate(optics.sensor_width_from_pixel(pixel, h_res), h_res, f, N, pixel,
+                            np.maximum(u_cm * 10, f * 1.001), min_dof_cm, max_dof_cm, required_px_at_5m)
+        passed += int(np.count_nonzero(r["ok"]))
+        covers += int(np.count_nonzero(r["covers"]))
+        px_ok += int(np.count_nonzero(r["px_ok"]))
+    return Yield(samples, passed, covers, px_ok, seed)
@@ -0,0 +1,156 @@
+"""Streaming video pixelation simulator.
+
+    python video_sim.py in.mp4 out.mp4 --camera 1920 2.9 8 500 [--scene-width-cm 18]
+
+Each frame is resampled to the pixel density the camera delivers at the
+given distance (cm_per_px, same formula as the page). It is shown side by
+side with the 18 cm / 80 px requirement. --scene-width-cm is the real
+width the input frame spans. The default, 18 cm, treats the frame as a
+face close-up, like the still-image comparison.
+
+Frames flow through a generator pipeline. At most --buffer frames are
+decoded ahead of the writer, and resampling runs on a thread pool
+(OpenCV releases the GIL). Needs OpenCV: pip install opencv-python-headless.
+"""
+import argparse
+import collections
+import concurrent.futures
+import os
+import sys
+import time
+
+import numpy as np
+
+import optics
+
+
+def _cv2():
+    try:
+        import cv2
+    except ImportError:
+        raise SystemExit("video_sim needs OpenCV: pip install opencv-python-headless")
+    return cv2
+
+
+def read_frames(path):
+    """Yield BGR frames from a video file."""
+    cv2 = _cv2()
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open {path}")
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+
+def pixelate_frame(frame, px_w):
+    """Reduce to px_w pixels across, blow back up with NEAREST.
+
+    The page downscales with PIL's BILINEAR, which widens its filter when
+    reducing and so averages every source pixel. cv2.INTER_LINEAR only
+    samples 2 × 2 neighbours and aliases on large reductions; INTER_AREA is
+    the OpenCV filter closest to PIL here. Blocks can differ from the page
+    by a few levels, but not in size or position.
+    """
+    cv2 = _cv2()
+    h, w = frame.shape[:2]
+    px_w = max(1, int(px_w))
+    px_h = max(1, round(px_w * h / w))
+    small = cv2.resize(frame, (px_w, px_h), interpolation=cv2.INTER_AREA)
+    return cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+
+
+def side_by_side(frame, computed_w, required_w, computed_px, required_px):
+    cv2 = _cv2()
+    left = pixelate_frame(frame, computed_w)
+    right = pixelate_frame(frame, required_w)
+    out = np.concatenate((left, right), axis=1)
+    w = frame.shape[1]
+    for x, text in ((10, f"Computed: {computed_px:.0f} px"), (w + 10, f"Required: {required_px:.0f} px")):
+        cv2.putText(out, text, (x, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 5, cv2.LINE_AA)
+        cv2.putText(out, text, (x, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2, cv2.LINE_AA)
+    return out
+
+
+def ordered_map(fn, items, workers, buffer):
+    """Like map(fn, items) on a thread pool, in order, with <= buffer items in flight."""
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        pending = collections.deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= buffer:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def frame_widths(px_for_18cm, scene_width_cm, required_px=optics.FACE_PIXELS):
+    """Pixels across the whole frame for the camera and for the requirement."""
+    scale = scene_width_cm / optics.FACE_WIDTH_CM
+    return px_for_18cm * scale, required_px * scale
+
+
+def run(in_path, out_path, px_for_18cm, scene_width_cm=optics.FACE_WIDTH_CM,
+        workers=None, buffer=None, log=sys.stderr):
+    """Write the side-by-side video; returns (frames, seconds, source fps)."""
+    cv2 = _cv2()
+    workers = workers or os.cpu_count() or 1
+    buffer = buffer or 2 * workers
+    cap = cv2.VideoCapture(in_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    computed_w, required_w = frame_widths(px_for_18cm, scene_width_cm)
+
+    def work(frame):
+        return side_by_side(frame, computed_w, required_w, px_for_18cm, optics.FACE_PIXELS)
+
+    writer = None
+    count = 0
+    start = time.perf_counter()
+    try:
+        for out in ordered_map(work, read_frames(in_path), workers, buffer):
+            if writer is None:
+                h, w = out.shape[:2]
+                writer = cv2.VideoWriter(out_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+            writer.write(out)
+            count += 1
+            if count % max(1, round(fps)) == 0:  # 約每秒影片回報一次；fps < 1 時每幀
+                rate = count / (time.perf_counter() - start)
+                print(f"{count:,} frames  {rate:,.1f} fps ({rate / fps:.2f}× real time)", file=log)
+    finally:
+        if writer is not None:
+            writer.release()
+    return count, time.perf_counter() - start, fps
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    p.add_argument("input", help="input video file")
+    p.add_argument("output", help="output .mp4 (side by side)")
+    g = p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--camera", nargs=4, type=float, metavar=("H_RES", "PIXEL_UM", "FOCAL_MM", "DIST_CM"),
+                   help="camera whose pixel density to simulate")
+    g.add_argument("--px", type=float, help="px_for_18cm directly")
+    p.add_argument("--scene-width-cm", type=float, default=optics.FACE_WIDTH_CM,
+                   help="real width spanned by the input frame")
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--buffer", type=int, default=None, help="max frames in flight (default 2 × workers)")
+    a = p.parse_args(argv)
+
+    px = a.px
+    if a.camera:
+        px = float(optics.face_pixels(*a.camera))
+    count, seconds, fps = run(a.input, a.output, px, a.scene_width_cm, a.workers, a.buffer)
+    rate = count / max(seconds, 1e-9)
+    print(f"done: {count:,} frames in {seconds:.1f} s ({rate:,.1f} fps, {rate / fps:.2f}× real time)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()